@@ -0,0 +1,14 @@
+from sqlalchemy import text
+from database import engine
+
+def migrate():
+    try:
+        with engine.begin() as conn:
+            print("Adding completion_key column if not exists...")
+            conn.execute(text("ALTER TABLE responses ADD COLUMN IF NOT EXISTS completion_key VARCHAR(64);"))
+        print("Migration complete successfully.")
+    except Exception as e:
+        print(f"Migration error: {e}")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,27 @@
+from sqlalchemy import text
+from database import engine
+
+def migrate():
+    try:
+        with engine.begin() as conn:
+            # 1. Sequence for response_items.item_id (replaces max(item_id) + 1 in complete_assessment)
+            print("Creating response_items_item_id_seq if not exists...")
+            conn.execute(text("CREATE SEQUENCE IF NOT EXISTS response_items_item_id_seq OWNED BY response_items.item_id;"))
+
+            # 2. Start after the highest existing id
+            print("Aligning sequence with existing item_ids...")
+            conn.execute(text(
+                "SELECT setval('response_items_item_id_seq', "
+                "COALESCE((SELECT MAX(item_id) FROM response_items), 0) + 1, false);"
+            ))
+
+            # 3. Use it as the column default
+            print("Setting item_id default...")
+            conn.execute(text("ALTER TABLE response_items ALTER COLUMN item_id SET DEFAULT nextval('response_items_item_id_seq');"))
+
+        print("Migration complete successfully.")
+    except Exception as e:
+        print(f"Migration error: {e}")
+
+if __name__ == "__main__":
+    migrate()
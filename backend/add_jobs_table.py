@@ -0,0 +1,27 @@
+from sqlalchemy import inspect, text
+from database import engine, Base
+from models import Job
+
+# Columns added after the table was first created
+LATER_COLUMNS = {
+    "claimed_at": "TIMESTAMP WITH TIME ZONE",
+    "lease_expires_at": "TIMESTAMP WITH TIME ZONE",
+}
+
+def migrate():
+    try:
+        print("Creating jobs table if not exists...")
+        Base.metadata.create_all(bind=engine, tables=[Job.__table__])
+        existing = {c["name"] for c in inspect(engine).get_columns("jobs")}
+        with engine.begin() as conn:
+            for name, type_ in LATER_COLUMNS.items():
+                if name not in existing:
+                    print(f"Adding jobs.{name}...")
+                    conn.execute(text(f"ALTER TABLE jobs ADD COLUMN {name} {type_}"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_jobs_lease_expires_at ON jobs (lease_expires_at)"))
+        print("Migration complete successfully.")
+    except Exception as e:
+        print(f"Migration error: {e}")
+
+if __name__ == "__main__":
+    migrate()
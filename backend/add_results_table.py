@@ -0,0 +1,13 @@
+from database import engine, Base
+from models import ResultSnapshot
+
+def migrate():
+    try:
+        print("Creating response_results table if not exists...")
+        Base.metadata.create_all(bind=engine, tables=[ResultSnapshot.__table__])
+        print("Migration complete successfully.")
+    except Exception as e:
+        print(f"Migration error: {e}")
+
+if __name__ == "__main__":
+    migrate()
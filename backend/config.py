@@ -19,17 +19,76 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    # Connection pool per process, shared by the sync and the async engine
+    # (size for: uvicorn threadpool + job workers per process, times worker processes <= DB max_connections)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0 # Max wait for a free connection
+    DB_POOL_RECYCLE_SECONDS: int = 1800 # Reconnect before the managed Postgres drops idle connections
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0 # 0 = no limit
+    DB_USE_NULLPOOL: bool = False # For PgBouncer in transaction mode (it does the pooling)
+    # Serve results / verify / questionnaire from async endpoints (asyncpg) instead of the threadpool
+    DB_ASYNC_ENDPOINTS: bool = True
+    DB_ASYNC_POOL_SHARE: float = 0.5 # Share of DB_POOL_SIZE / DB_MAX_OVERFLOW given to the async engine (the sync engine keeps the rest)
     
     # ML Models
     # Updated to handle Prod vs Dev differences
     # Prod: modules/benchmarking_ai/ml_v5
     # Dev (relative to backend): ../../../benchmarking_ai/ml_v5
     ML_MODELS_PATH: str = "modules/benchmarking_ai/ml_v5/model_artifacts/v5"
+    # Models load in a background thread after startup; results requests wait at most this long for them
+    ML_LOAD_WAIT_SECONDS: float = 30.0
+
+    # Reference data cache (questions / answers / dimensions)
+    # Full reload after TTL; cheap row-count/checksum probe in between.
+    REFERENCE_DATA_TTL_SECONDS: int = 3600
+    REFERENCE_DATA_PROBE_SECONDS: int = 30
+    # GET /questionnaire is served as pre-serialized JSON (ETag / 304), gzipped for clients that accept it
+    QUESTIONNAIRE_GZIP: bool = True
+
+    # Results cache (get_results payloads keyed by result_hash, lang, model version)
+    RESULTS_CACHE_ENABLED: bool = True
+    RESULTS_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESULTS_CACHE_MAX_ENTRIES: int = 5000
+
+    # Persisted results (response_results table)
+    # Results are always persisted on first computation (at the latest when /verify renders the PDF).
+    # Enable to compute them already at /complete, before the user clicks the verification link.
+    RESULTS_PRECOMPUTE_ON_COMPLETE: bool = False
+
+    # Session store (in-progress assessments)
+    # "memory": process-local, single worker only. "sql": shared via SESSION_STORE_URL
+    # (e.g. sqlite:////var/run/ai-compass/sessions.db for one node; empty = main DATABASE_URL)
+    SESSION_STORE_BACKEND: str = "memory"
+    SESSION_STORE_URL: str = ""
+    SESSION_TTL_SECONDS: int = 24 * 3600 # Abandoned sessions are dropped after this long without an autosave
+    SESSION_MAX_ACTIVE: int = 20000 # Least recently active sessions beyond this are dropped
+    SESSION_SWEEP_INTERVAL_SECONDS: int = 60
+    # Write-ahead log + snapshots for the "memory" backend (empty dir = disabled, sessions die with the process)
+    SESSION_WAL_DIR: str = ""
+    SESSION_WAL_DURABILITY: str = "batch" # "always": fsync per write, "batch": every SESSION_WAL_FSYNC_INTERVAL_MS, "off": never fsync
+    SESSION_WAL_FSYNC_INTERVAL_MS: int = 100
+    SESSION_WAL_SNAPSHOT_EVERY: int = 50000 # Log records between compacted snapshots
+
+    # Background jobs (PDF rendering / email dispatch)
+    JOB_WORKERS: int = 2
+    JOB_QUEUE_MAX_SIZE: int = 200
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: float = 10.0 # Doubles with every failed attempt
+    JOB_LEASE_SECONDS: int = 600 # A running job not finished within this is presumed dead and re-claimable
+    JOB_POLL_INTERVAL_SECONDS: float = 15.0 # Outbox drainer: how often committed but unsubmitted jobs are picked up
 
     # Email
     BREVO_API_KEY: str = ""
     FRONTEND_URL: str = "https://the-ai-compass.de"
 
+    # Brevo HTTP transport (keep-alive pool)
+    EMAIL_HTTP_MAX_CONNECTIONS: int = 4 # Also caps concurrent sends
+    EMAIL_HTTP_CONNECT_TIMEOUT: float = 5.0
+    EMAIL_HTTP_READ_TIMEOUT: float = 20.0
+    EMAIL_HTTP_IDLE_SECONDS: float = 30.0 # Idle connections older than this are not reused
+
     @field_validator("ML_MODELS_PATH", mode="before")
     @classmethod
     def set_models_path(cls, v: Any) -> str:
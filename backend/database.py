@@ -1,21 +1,252 @@
-from sqlalchemy import create_engine
+import logging
+import shlex
+import threading
+import time
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 # SQLAlchemy requires postgresql:// instead of postgres://
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL.replace("postgres://", "postgresql://")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+class PoolMetrics:
+    """Connection pool counters (checkouts, wait time, timeouts, pre-ping invalidations)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record_wait(time.perf_counter() - start)
+        return conn
+
+
+def _pool_split(total: int, minimum: int) -> tuple:
+    """
+    Splits a per-process connection budget (DB_POOL_SIZE / DB_MAX_OVERFLOW) into
+    (sync engine, async engine), so enabling the async endpoints does not double the peak.
+    """
+    if not settings.DB_ASYNC_ENDPOINTS:
+        return total, minimum # The async engine is not used
+    async_part = max(minimum, round(total * settings.DB_ASYNC_POOL_SHARE))
+    return max(minimum, total - async_part), async_part
+
+
+def engine_kwargs(url: str, pool_size: int, max_overflow: int, poolclass=QueuePool) -> dict:
+    """
+    create_engine() arguments for url from the DB_* settings (pre-ping, timeouts, recycling, PgBouncer).
+    Also used for other engines on the same server (e.g. the SQL session store).
+    """
+    kwargs = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if settings.DB_USE_NULLPOOL:
+        # PgBouncer (transaction pooling) owns the pooling: open/close per checkout
+        kwargs["poolclass"] = NullPool
+    else:
+        kwargs.update(
+            poolclass=poolclass,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS
+        )
+    if settings.DB_STATEMENT_TIMEOUT_MS and url.startswith("postgresql"):
+        kwargs["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return kwargs
+
+
+def _engine_kwargs() -> dict:
+    return engine_kwargs(
+        SQLALCHEMY_DATABASE_URL,
+        pool_size=_pool_split(settings.DB_POOL_SIZE, 1)[0],
+        max_overflow=_pool_split(settings.DB_MAX_OVERFLOW, 0)[0],
+        poolclass=InstrumentedQueuePool
+    )
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_kwargs())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+event.listen(engine, "connect", lambda *a: pool_metrics.incr("connects"))
+event.listen(engine, "checkout", lambda *a: pool_metrics.incr("checkouts"))
+event.listen(engine, "checkin", lambda *a: pool_metrics.incr("checkins"))
+event.listen(engine, "invalidate", lambda *a: pool_metrics.incr("invalidations"))
+
 Base = declarative_base()
 
+
+# Async engine (SQLAlchemy asyncio + asyncpg) for the async endpoints, created on first use
+_async_engine = None
+_async_sessionmaker = None
+_async_lock = threading.Lock()
+
+# DATABASE_URL query parameters asyncpg takes as they are; other libpq parameters are translated or dropped
+_ASYNCPG_QUERY_PARAMS = ("host", "port", "target_session_attrs", "prepared_statement_cache_size")
+_LIBPQ_SSL_PARAMS = ("sslmode", "sslrootcert", "sslcert", "sslkey", "sslpassword")
+
+def _last(value):
+    return value[-1] if isinstance(value, tuple) else value
+
+def _asyncpg_ssl(params: dict):
+    """libpq ssl* parameters -> asyncpg's ssl argument (an sslmode name, or an SSLContext for certificate files)."""
+    mode = params.get("sslmode")
+    rootcert, cert = params.get("sslrootcert"), params.get("sslcert")
+    if mode == "disable" or not (rootcert or cert):
+        return mode # asyncpg accepts the libpq sslmode names
+    import ssl
+    context = ssl.create_default_context(cafile=None if rootcert in (None, "system") else rootcert)
+    if cert:
+        context.load_cert_chain(cert, params.get("sslkey"), password=params.get("sslpassword"))
+    # As libpq: a root certificate turns "require" into "verify-ca"; only verify-full checks the host name
+    context.check_hostname = mode == "verify-full"
+    if not rootcert and mode not in ("verify-ca", "verify-full"):
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+def _libpq_server_settings(options: str) -> dict:
+    """libpq options ("-c statement_timeout=5000 -c search_path=app") -> asyncpg server_settings."""
+    server_settings = {}
+    tokens = shlex.split(options)
+    while tokens:
+        token = tokens.pop(0)
+        if token == "-c" and tokens:
+            token = tokens.pop(0)
+        elif token.startswith("-c") or token.startswith("--"):
+            token = token[2:]
+        else:
+            logger.warning(f"Ignoring libpq option '{token}' for the async engine")
+            continue
+        name, sep, value = token.partition("=")
+        if sep:
+            server_settings[name.replace("-", "_")] = value
+    return server_settings
+
+def _async_engine_args(url: str) -> tuple:
+    """
+    Converts the libpq/psycopg2 DATABASE_URL for asyncpg, whose connect() rejects libpq
+    query parameters such as sslmode. Returns (url, connect_args).
+    """
+    from sqlalchemy.engine import make_url
+    url = make_url(url)
+    query = dict(url.query)
+    connect_args = {}
+
+    ssl = _asyncpg_ssl({k: _last(query.pop(k)) for k in _LIBPQ_SSL_PARAMS if k in query})
+    if ssl is not None:
+        connect_args["ssl"] = ssl
+    server_settings = {}
+    if "options" in query:
+        server_settings.update(_libpq_server_settings(_last(query.pop("options"))))
+    if "application_name" in query:
+        server_settings["application_name"] = _last(query.pop("application_name"))
+    if server_settings:
+        connect_args["server_settings"] = server_settings
+    if "connect_timeout" in query:
+        connect_args["timeout"] = float(_last(query.pop("connect_timeout")))
+
+    dropped = sorted(k for k in query if k not in _ASYNCPG_QUERY_PARAMS)
+    if dropped:
+        logger.warning(f"Ignoring DATABASE_URL parameters not supported by asyncpg: {', '.join(dropped)}")
+    url = url.set(drivername="postgresql+asyncpg",
+                  query={k: v for k, v in query.items() if k in _ASYNCPG_QUERY_PARAMS})
+    return url.render_as_string(hide_password=False), connect_args
+
+def get_async_sessionmaker():
+    global _async_engine, _async_sessionmaker
+    if _async_sessionmaker is None:
+        with _async_lock:
+            if _async_sessionmaker is None:
+                from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+                url, connect_args = _async_engine_args(SQLALCHEMY_DATABASE_URL)
+                kwargs = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+                if settings.DB_USE_NULLPOOL:
+                    kwargs["poolclass"] = NullPool
+                    # PgBouncer in transaction mode cannot keep server-side prepared statements
+                    connect_args["statement_cache_size"] = 0
+                else:
+                    kwargs.update(
+                        pool_size=_pool_split(settings.DB_POOL_SIZE, 1)[1],
+                        max_overflow=_pool_split(settings.DB_MAX_OVERFLOW, 0)[1],
+                        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+                        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS
+                    )
+                if settings.DB_STATEMENT_TIMEOUT_MS:
+                    connect_args.setdefault("server_settings", {})["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+                if connect_args:
+                    kwargs["connect_args"] = connect_args
+                _async_engine = create_async_engine(url, **kwargs)
+                _async_sessionmaker = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_sessionmaker
+
+def get_pool_stats() -> dict:
+    """Pool gauges (current state) + cumulative counters."""
+    pool = engine.pool
+    gauges = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        gauges.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow()
+        )
+    return {**gauges, **pool_metrics.snapshot()}
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
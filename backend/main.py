@@ -52,6 +52,27 @@ except Exception as e:
     logger.error(f"Error including router: {e}")
     raise e
 
+@app.on_event("startup")
+def resume_background_jobs():
+    # Pick up PDF/email jobs left unfinished by a previous process
+    try:
+        from services.job_queue import job_queue
+        job_queue.resume_pending()
+    except Exception as e:
+        logger.error(f"Could not resume background jobs: {e}")
+
+@app.on_event("startup")
+def load_ml_models():
+    # Unpickling the models takes seconds: do it in the background so the worker starts serving at once
+    from services.model_loader import model_loader
+    model_loader.start()
+
+@app.on_event("shutdown")
+def flush_session_store():
+    # Flush the session write-ahead log (if enabled) on graceful shutdown
+    from services.session_store import session_store
+    session_store.close()
+
 @app.get("/")
 def root():
     logger.info("Health check endpoint hit")
@@ -60,3 +81,24 @@ def root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+@app.get("/ready")
+def readiness_check():
+    # Readiness probe: 503 until the ML models are loaded (results would have to wait for them)
+    from fastapi.responses import JSONResponse
+    from services.model_loader import model_loader
+    return JSONResponse(status_code=200 if model_loader.ready else 503, content={"ready": model_loader.ready, "models": model_loader.status()})
+
+@app.get("/health/stats")
+def health_stats():
+    # Resident-state gauges and eviction counters for monitoring
+    from services.session_store import session_store
+    from services.results_cache import results_cache
+    from services.job_queue import job_queue
+    from database import get_pool_stats
+    return {
+        "db_pool": get_pool_stats(),
+        "sessions": session_store.stats(),
+        "results_cache": results_cache.stats(),
+        "jobs": job_queue.stats()
+    }
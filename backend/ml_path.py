@@ -0,0 +1,21 @@
+import os
+import sys
+
+# Add project root to sys.path to allow importing from benchmarking_ai
+# PROD: backend/modules/benchmarking_ai -> Add backend/modules to path
+# DEV: benchmarking_ai (sibling of backend) -> Add ../../.. to path
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+prod_module_path = os.path.join(current_dir, "modules")
+
+if os.path.exists(prod_module_path):
+    ml_modules_path = prod_module_path
+    if ml_modules_path not in sys.path:
+        sys.path.append(ml_modules_path)
+        print(f"Added PROD path to sys.path: {ml_modules_path}")
+else:
+    # Fallback to Dev
+    ml_modules_path = os.path.abspath(os.path.join(current_dir, "../../../"))
+    if ml_modules_path not in sys.path:
+        sys.path.append(ml_modules_path)
+        print(f"Added DEV path to sys.path: {ml_modules_path}")
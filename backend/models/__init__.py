@@ -1,4 +1,5 @@
 from .company import Company
 from .dimension import Dimension
 from .question import Question, Answer
-from .response import Response, ResponseItem, ClusterProfile
+from .response import Response, ResponseItem, ClusterProfile, ResultSnapshot
+from .job import Job
@@ -0,0 +1,19 @@
+import uuid
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, JSON
+from database import Base
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    job_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    kind = Column(String(50), nullable=False) # Handler name, e.g. "results_email"
+    ref = Column(String(64), index=True) # Lookup key for status polling (result_hash)
+    payload = Column(JSON)
+    status = Column(String(20), default="queued", index=True) # queued, running, retrying, succeeded, failed
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    last_error = Column(Text)
+    claimed_at = Column(TIMESTAMP(timezone=True)) # Last claim by a worker
+    lease_expires_at = Column(TIMESTAMP(timezone=True), index=True) # running: claim owned until; retrying: backoff until
+    created_at = Column(TIMESTAMP(timezone=True))
+    updated_at = Column(TIMESTAMP(timezone=True))
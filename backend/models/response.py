@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, Integer, String, Float, TIMESTAMP, BigInteger, ForeignKey, ARRAY, Boolean
+from sqlalchemy import Column, Integer, String, Float, TIMESTAMP, BigInteger, ForeignKey, ARRAY, Boolean, JSON, Sequence
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -22,6 +22,7 @@ class Response(Base):
     created_at = Column(TIMESTAMP(timezone=True))
     cluster_id = Column(BigInteger, ForeignKey("cluster_profiles.cluster_id"))
     lang = Column(String, default='en')
+    completion_key = Column(String(64)) # Idempotency-Key of the /complete request that persisted it
 
     # Relationships
     company = relationship("Company")
@@ -31,7 +32,8 @@ class Response(Base):
 class ResponseItem(Base):
     __tablename__ = "response_items"
 
-    item_id = Column(Integer, primary_key=True, index=True)
+    # DB-generated (see add_item_id_sequence.py), no more max(item_id) + 1 in application code
+    item_id = Column(Integer, Sequence("response_items_item_id_seq"), primary_key=True, index=True)
     response_id = Column(Integer, ForeignKey("responses.response_id"))
     question_id = Column(Integer, ForeignKey("questions.question_id"))
     answers = Column(ARRAY(Integer)) # PostgreSQL specific array type
@@ -39,3 +41,16 @@ class ResponseItem(Base):
     # Relationships
     response = relationship("Response", back_populates="items")
     question = relationship("Question")
+
+class ResultSnapshot(Base):
+    __tablename__ = "response_results"
+
+    # One precomputed analysis per response and language (texts are localized)
+    response_id = Column(Integer, ForeignKey("responses.response_id"), primary_key=True)
+    lang = Column(String(8), primary_key=True)
+    model_version = Column(String(64)) # Stale once the ML artifacts or reference data change
+    payload = Column(JSON) # Serialized get_results output
+    created_at = Column(TIMESTAMP(timezone=True))
+
+    # Relationships
+    response = relationship("Response")
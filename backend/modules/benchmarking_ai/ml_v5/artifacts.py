@@ -0,0 +1,341 @@
+"""
+Pickle-free artifact bundle for the ml_v5 models.
+
+    model_artifacts/v5_bundle/
+        manifest.json   format version, model version, column names, label map, statistics,
+                        and name / dtype / shape / sha1 of every array
+        *.npy           plain NumPy arrays (scaler parameters, centroids, PCA components,
+                        training matrices, presorted percentile arrays)
+
+load_bundle() memory-maps the arrays (np.load(mmap_mode="r")): loading is near-instant,
+worker processes share the pages through the OS page cache, and nothing depends on
+sklearn/pandas pickle compatibility. The fitted sklearn estimators are replaced by the small
+NumPy equivalents below, which expose the methods the models call (transform, predict, kneighbors).
+Every array is checked against its sha1 in the manifest on load, so a truncated or swapped
+file fails the load instead of silently changing results.
+
+Export the bundle from the pickles (run from the modules directory):
+    python -m benchmarking_ai.ml_v5.artifacts [path_prefix]
+"""
+
+import glob
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+BUNDLE_FORMAT = 1
+MANIFEST = "manifest.json"
+
+
+DEFAULT_PATH_PREFIX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_artifacts", "v5")
+
+
+def bundle_dir(path_prefix):
+    return f"{path_prefix}_bundle"
+
+
+def has_bundle(path_prefix):
+    return os.path.exists(os.path.join(bundle_dir(path_prefix), MANIFEST))
+
+
+def pickle_artifacts_version(path_prefix):
+    """
+    Content hash of the pickled artifact files (e.g. v5_kmeans.pkl, v5_labels.json).
+    Changes whenever the models are retrained, so cached results can be keyed on it.
+    """
+    digest = hashlib.sha1()
+    for file_path in sorted(glob.glob(f"{path_prefix}_*")):
+        if not os.path.isfile(file_path):
+            continue # The bundle directory
+        digest.update(os.path.basename(file_path).encode("utf-8"))
+        with open(file_path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def artifacts_version(path_prefix=DEFAULT_PATH_PREFIX):
+    """
+    The model_version InferenceEngine reports for these artifacts, without loading them:
+    the bundle manifest's, else the content hash of the pickles.
+    """
+    if has_bundle(path_prefix):
+        with open(os.path.join(bundle_dir(path_prefix), MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)["model_version"]
+    return pickle_artifacts_version(path_prefix)
+
+
+# --- NumPy equivalents of the fitted sklearn estimators ---
+
+def _as_matrix(X, feature_names=None):
+    if hasattr(X, "columns"):
+        if feature_names is not None:
+            X = X[list(feature_names)]
+        X = X.to_numpy(dtype=np.float64)
+    return np.atleast_2d(np.asarray(X, dtype=np.float64))
+
+
+class ArrayScaler:
+    """StandardScaler.transform: (X - mean) / scale."""
+
+    def __init__(self, mean, scale, feature_names=None):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.feature_names_in_ = feature_names
+
+    def transform(self, X):
+        X = _as_matrix(X, self.feature_names_in_) - self.mean_
+        X /= self.scale_
+        return X
+
+
+class ArrayKMeans:
+    """KMeans.predict: index of the nearest centroid."""
+
+    def __init__(self, cluster_centers):
+        self.cluster_centers_ = cluster_centers
+
+    def predict(self, X):
+        X = _as_matrix(X)
+        distances = ((X[:, None, :] - self.cluster_centers_[None, :, :]) ** 2).sum(axis=2)
+        return distances.argmin(axis=1)
+
+
+class ArrayPCA:
+    """PCA.transform (whiten=False), projecting first and centering after, like sklearn."""
+
+    def __init__(self, components, mean):
+        self.components_ = components
+        self.mean_ = mean
+        self._projected_mean = mean.reshape(1, -1) @ components.T
+
+    def transform(self, X):
+        X = _as_matrix(X) @ self.components_.T
+        X -= self._projected_mean
+        return X
+
+
+class ArrayNearestNeighbors:
+    """NearestNeighbors(metric='cosine').kneighbors by brute force."""
+
+    def __init__(self, fit_X, n_neighbors):
+        self._fit_X = fit_X
+        self.n_neighbors = n_neighbors
+        norms = np.linalg.norm(fit_X, axis=1, keepdims=True)
+        self._fit_unit = fit_X / np.where(norms == 0, 1.0, norms)
+
+    def kneighbors(self, X):
+        X = _as_matrix(X)
+        norms = np.linalg.norm(X, axis=1, keepdims=True)
+        unit = X / np.where(norms == 0, 1.0, norms)
+        distances = np.clip(1.0 - unit @ self._fit_unit.T, 0.0, 2.0)
+        indices = np.argsort(distances, axis=1, kind="stable")[:, :self.n_neighbors]
+        return np.take_along_axis(distances, indices, axis=1), indices
+
+
+# --- Export ---
+
+def _encode_industries(values):
+    """Object column -> (int32 codes, list of names); missing values get code -1."""
+    names = sorted({v for v in values if isinstance(v, str)})
+    index = {name: i for i, name in enumerate(names)}
+    codes = np.array([index.get(v, -1) for v in values], dtype=np.int32)
+    return codes, names
+
+
+def _percentile_arrays(codes, industries, total_maturity):
+    """total_maturity sorted per industry (one array, [start, stop) per group) plus sorted globally."""
+    order = np.lexsort((total_maturity, codes))
+    sorted_codes = codes[order]
+    groups = {}
+    for code, name in enumerate(industries):
+        start, stop = np.searchsorted(sorted_codes, [code, code + 1])
+        groups[name] = [int(start), int(stop)]
+    return total_maturity[order], np.sort(total_maturity), groups
+
+
+def save_bundle(path_prefix, ce, sga, rg, model_version):
+    """Writes the fitted ClusterEngine / StrategicGapAnalyzer / RoadmapGenerator as a bundle."""
+    if ce.pca.whiten:
+        raise ValueError("Bundles do not support whitened PCA")
+
+    arrays = {
+        "cluster_scaler_mean": ce.scaler.mean_,
+        "cluster_scaler_scale": ce.scaler.scale_,
+        "cluster_centers": ce.model.cluster_centers_,
+        "pca_components": ce.pca.components_,
+        "pca_mean": ce.pca.mean_,
+    }
+    cluster_features = [str(c) for c in getattr(ce.scaler, "feature_names_in_", [])] or None
+
+    industry = None
+    if ce.industry_data is not None:
+        codes, industries = _encode_industries(ce.industry_data["industry"].tolist())
+        total_maturity = ce.industry_data["total_maturity"].to_numpy(dtype=np.float64)
+        by_industry, global_sorted, groups = _percentile_arrays(codes, industries, total_maturity)
+        arrays.update({
+            "industry_company_ids": ce.industry_data["company_id"].to_numpy(dtype=np.int64),
+            "industry_codes": codes,
+            "industry_total_maturity": total_maturity,
+            "percentile_by_industry": by_industry,
+            "percentile_global": global_sorted,
+        })
+        industry = {"industries": industries, "percentile_groups": groups}
+
+    dim_cols = [c for c in rg.dim_data_train.columns if c not in ("total_maturity", "industry")]
+    roadmap = {
+        "dimensions": dim_cols,
+        "question_ids": [int(q) for q in rg.question_data_train.columns],
+        "peer_dim_averages": rg.peer_dim_averages,
+        "knn_n_neighbors": int(rg.knn.n_neighbors),
+        "industries": None
+    }
+    if rg.knn.metric != "cosine":
+        raise ValueError(f"Bundles only support cosine KNN, not {rg.knn.metric}")
+    arrays.update({
+        "roadmap_company_ids": rg.dim_data_train.index.to_numpy(dtype=np.int64),
+        "roadmap_dimensions": rg.dim_data_train[dim_cols].to_numpy(dtype=np.float64),
+        "roadmap_total_maturity": rg.dim_data_train["total_maturity"].to_numpy(dtype=np.float64),
+        "roadmap_question_company_ids": rg.question_data_train.index.to_numpy(dtype=np.int64),
+        "roadmap_questions": rg.question_data_train.to_numpy(dtype=np.float64),
+        "roadmap_scaler_mean": rg.scaler.mean_,
+        "roadmap_scaler_scale": rg.scaler.scale_,
+        "knn_fit_X": np.asarray(rg.knn._fit_X, dtype=np.float64),
+    })
+    if "industry" in rg.dim_data_train.columns:
+        codes, industries = _encode_industries(rg.dim_data_train["industry"].tolist())
+        arrays["roadmap_industry_codes"] = codes
+        roadmap["industries"] = industries
+
+    directory = bundle_dir(path_prefix)
+    os.makedirs(directory, exist_ok=True)
+    entries = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        file_name = f"{name}.npy"
+        np.save(os.path.join(directory, file_name), array, allow_pickle=False)
+        entries[name] = {
+            "file": file_name,
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "sha1": hashlib.sha1(array.tobytes()).hexdigest()
+        }
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "model_version": model_version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "cluster": {
+            "features": cluster_features,
+            "labels_map": {str(k): v for k, v in ce.labels_map.items()}
+        },
+        "industry": industry,
+        "gap_analyzer": {"pair_stats": sga.pair_stats, "dim_benchmarks": sga.dim_benchmarks},
+        "roadmap": roadmap,
+        "arrays": entries
+    }
+    # Manifest last: a bundle without one is ignored by the loader
+    tmp_path = os.path.join(directory, MANIFEST + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(directory, MANIFEST))
+    return directory
+
+
+# --- Load ---
+
+def _load_arrays(directory, entries, mmap, verify):
+    arrays = {}
+    for name, entry in entries.items():
+        array = np.load(os.path.join(directory, entry["file"]), mmap_mode="r" if mmap else None, allow_pickle=False)
+        if array.dtype.str != entry["dtype"] or list(array.shape) != entry["shape"]:
+            raise ValueError(f"Artifact {entry['file']} does not match the manifest")
+        # Hashes the (mapped) buffer in place, as written by save_bundle
+        if verify and hashlib.sha1(np.ascontiguousarray(array).data).hexdigest() != entry["sha1"]:
+            raise ValueError(f"Artifact {entry['file']} is corrupt (sha1 does not match the manifest)")
+        arrays[name] = array
+    return arrays
+
+
+def _decode_industries(codes, industries):
+    names = np.array(industries + [None], dtype=object)
+    return names[codes] # code -1 -> None
+
+
+def load_bundle(path_prefix, ce, sga, rg, mmap=True, verify=True):
+    """
+    Populates the three (unfitted) models from the bundle and returns its manifest.
+    verify: check every array against its sha1 in the manifest (raises ValueError on a mismatch).
+    """
+    import pandas as pd
+    from benchmarking_ai.ml_v5.models import PercentileIndex
+
+    directory = bundle_dir(path_prefix)
+    with open(os.path.join(directory, MANIFEST), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported artifact bundle format {manifest.get('format')}")
+    a = _load_arrays(directory, manifest["arrays"], mmap, verify)
+
+    # ClusterEngine
+    cluster = manifest["cluster"]
+    ce.scaler = ArrayScaler(a["cluster_scaler_mean"], a["cluster_scaler_scale"], cluster["features"])
+    ce.model = ArrayKMeans(a["cluster_centers"])
+    ce.pca = ArrayPCA(a["pca_components"], a["pca_mean"])
+    ce.labels_map = {int(k): v for k, v in cluster["labels_map"].items()}
+    ce.compile()
+    industry = manifest["industry"]
+    if industry is not None:
+        ce.industry_data = pd.DataFrame({
+            "company_id": a["industry_company_ids"],
+            "industry": _decode_industries(a["industry_codes"], industry["industries"]),
+            "total_maturity": a["industry_total_maturity"]
+        })
+        # Presorted at export: the index is views into the (memory-mapped) arrays
+        by_industry = a["percentile_by_industry"]
+        ce.percentile_index = PercentileIndex(a["percentile_global"], {
+            name: by_industry[start:stop] for name, (start, stop) in industry["percentile_groups"].items()
+        })
+
+    # StrategicGapAnalyzer
+    sga.pair_stats = manifest["gap_analyzer"]["pair_stats"]
+    sga.dim_benchmarks = manifest["gap_analyzer"]["dim_benchmarks"]
+
+    # RoadmapGenerator
+    roadmap = manifest["roadmap"]
+    company_index = pd.Index(a["roadmap_company_ids"], name="company_id")
+    dim_data = pd.DataFrame(a["roadmap_dimensions"], index=company_index,
+                            columns=pd.Index(roadmap["dimensions"], name="dimension_name"))
+    if roadmap["industries"] is not None:
+        dim_data["industry"] = _decode_industries(a["roadmap_industry_codes"], roadmap["industries"])
+    dim_data["total_maturity"] = a["roadmap_total_maturity"]
+    rg.dim_data_train = dim_data
+    rg.question_data_train = pd.DataFrame(
+        a["roadmap_questions"],
+        index=pd.Index(a["roadmap_question_company_ids"], name="company_id"),
+        columns=pd.Index(roadmap["question_ids"], name="question_id")
+    )
+    rg.peer_dim_averages = roadmap["peer_dim_averages"]
+    rg.scaler = ArrayScaler(a["roadmap_scaler_mean"], a["roadmap_scaler_scale"])
+    rg.knn = ArrayNearestNeighbors(a["knn_fit_X"], roadmap["knn_n_neighbors"])
+    return manifest
+
+
+def export_pickles(path_prefix):
+    """Converts the pickled models at path_prefix into a bundle next to them."""
+    from benchmarking_ai.ml_v5.models import ClusterEngine, StrategicGapAnalyzer, RoadmapGenerator
+
+    ce, sga, rg = ClusterEngine(), StrategicGapAnalyzer(), RoadmapGenerator()
+    ce.load_model(path_prefix)
+    sga.load_model(path_prefix)
+    rg.load_model(path_prefix)
+    return save_bundle(path_prefix, ce, sga, rg, pickle_artifacts_version(path_prefix))
+
+
+if __name__ == "__main__":
+    default_prefix = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_artifacts", "v5")
+    prefix = sys.argv[1] if len(sys.argv) > 1 else default_prefix
+    print(f"Bundle written to {export_pickles(prefix)}")
@@ -0,0 +1,56 @@
+"""
+Benchmark for the shared ScoringEngine batch path (score_csr).
+Uses a synthetic questionnaire shaped like production (8 dimensions, 33 questions, ~180 answers)
+and prints the per-response cost for growing populations; it should stay flat (linear scaling).
+"""
+
+import sys
+import time
+import numpy as np
+from benchmarking_ai.ml_v5.scoring import ScoringEngine
+
+def build_engine(rng, n_dims=8, n_questions=33, answers_per_question=(3, 8)):
+    dimensions = [{"dimension_id": d, "dimension_name": f"Dimension {d}"} for d in range(1, n_dims + 1)]
+    questions, answers = [], []
+    answer_id = 0
+    for q_id in range(1, n_questions + 1):
+        questions.append({
+            "question_id": q_id,
+            "dimension_id": int(rng.integers(1, n_dims + 1)),
+            "type": "Checklist" if q_id % 5 == 0 else "Choice",
+            "weight": float(rng.uniform(1, 5))
+        })
+        for level in range(int(rng.integers(*answers_per_question))):
+            answer_id += 1
+            answers.append({"answer_id": answer_id, "question_id": q_id, "answer_weight": float(level + 1)})
+    return ScoringEngine(questions, answers, dimensions), answers
+
+def build_population(rng, answers, n_responses):
+    by_question = {}
+    for a in answers:
+        by_question.setdefault(a["question_id"], []).append(a["answer_id"])
+    q_ids = np.array(sorted(by_question), dtype=np.int64)
+
+    item_offsets = np.arange(n_responses + 1, dtype=np.int64) * len(q_ids)
+    item_question_ids = np.tile(q_ids, n_responses)
+    # One answer per item (random valid choice)
+    answer_offsets = np.arange(len(item_question_ids) + 1, dtype=np.int64)
+    first = np.array([by_question[q][0] for q in q_ids], dtype=np.int64)
+    n_opts = np.array([len(by_question[q]) for q in q_ids], dtype=np.int64)
+    answer_ids = np.tile(first, n_responses) + rng.integers(0, np.tile(n_opts, n_responses))
+    return item_offsets, item_question_ids, answer_offsets, answer_ids
+
+def main(sizes):
+    rng = np.random.default_rng(42)
+    engine, answers = build_engine(rng)
+    print(f"{'responses':>10} {'seconds':>9} {'us/response':>12}")
+    for n in sizes:
+        csr = build_population(rng, answers, n)
+        start = time.perf_counter()
+        engine.score_csr(*csr)
+        elapsed = time.perf_counter() - start
+        print(f"{n:>10} {elapsed:>9.3f} {elapsed / n * 1e6:>12.2f}")
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or [1_000, 10_000, 100_000, 300_000]
+    main(sizes)
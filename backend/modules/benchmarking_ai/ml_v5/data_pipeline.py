@@ -1,9 +1,12 @@
 
 import os
+import itertools
 import pandas as pd
+import numpy as np
 import psycopg2
 from psycopg2 import extras
 from dotenv import load_dotenv
+from benchmarking_ai.ml_v5.scoring import ScoringEngine
 
 load_dotenv()
 
@@ -105,74 +108,44 @@ class DataPipeline:
         answers_ref = pd.DataFrame(cur.fetchall())
         cur.close()
 
-        # 1. Flatten Items and merge with metadata
-        items_exploded = items.explode('answers')
-        items_exploded = items_exploded.rename(columns={'answers': 'answer_id'})
-        
-        # Merge to get answer weights
-        full_df = items_exploded.merge(answers_ref, on=['answer_id', 'question_id'], how='left')
-        full_df = full_df.merge(questions, on='question_id', how='left')
-        full_df = full_df.merge(dimensions, on='dimension_id', how='left')
-        full_df = full_df.merge(responses, on='response_id', how='left')
-        
-        # 2. Calculate Reference Weights
-        ans_stats = answers_ref.groupby('question_id').agg(
-            total_possible_weight=('answer_weight', 'sum'),
-            max_possible_weight=('answer_weight', 'max')
-        ).reset_index()
-        
-        full_df = full_df.merge(ans_stats, on='question_id', how='left')
+        # 1. Compile the shared scoring kernel (same formula as the live results and total_score)
+        engine = ScoringEngine(
+            questions.to_dict('records'),
+            answers_ref.to_dict('records'),
+            dimensions.to_dict('records')
+        )
 
-        # 3. Aggregating Selected Answer Weights per Question per Company
-        grouped_questions = full_df.groupby([
-            'company_id', 'question_id', 'dimension_name', 'weight', 'type', 
-            'total_possible_weight', 'max_possible_weight'
-        ])['answer_weight'].sum().reset_index()
-        
-        grouped_questions = grouped_questions.rename(columns={'weight': 'question_weight', 'answer_weight': 'sum_selected_weight'})
+        # 2. Pack items per company into CSR arrays (a company's responses are scored together)
+        items = items.merge(responses[['response_id', 'company_id']], on='response_id', how='left')
+        items = items.dropna(subset=['company_id']).sort_values('company_id', kind='stable')
+        company_ids, item_counts = np.unique(items['company_id'].to_numpy(dtype=np.int64), return_counts=True)
+        item_offsets = np.concatenate([[0], np.cumsum(item_counts)])
 
-        # 4. Apply Scoring Logic
-        def calculate_question_score(row):
-            if row['type'] == 'Checklist':
-                total_w = row['total_possible_weight']
-                ratio = row['sum_selected_weight'] / total_w if total_w > 0 else 0
-            else:
-                max_w = row['max_possible_weight']
-                ratio = row['sum_selected_weight'] / max_w if max_w > 0 else 0
-            
-            return (ratio * row['question_weight']) / 100
+        item_answers = [a if isinstance(a, list) else [] for a in items['answers']]
+        answer_offsets = np.concatenate([[0], np.cumsum([len(a) for a in item_answers], dtype=np.int64)])
+        answer_ids = np.fromiter(itertools.chain.from_iterable(item_answers), dtype=np.int64, count=int(answer_offsets[-1]))
 
-        grouped_questions['question_score_contrib'] = grouped_questions.apply(calculate_question_score, axis=1)
-        
-        # Keep a 1-5 version for the Question Matrix for readability and 'weighted impact' calc
-        grouped_questions['score_1to5'] = (grouped_questions['question_score_contrib'] / (grouped_questions['question_weight'] / 100)) * 4 + 1
-        grouped_questions['score_1to5'] = grouped_questions['score_1to5'].fillna(1.0)
+        # 3. Batch Scoring (one vectorized pass over all companies)
+        scores = engine.score_csr(item_offsets, items['question_id'].to_numpy(dtype=np.int64), answer_offsets, answer_ids)
+        company_index = pd.Index(company_ids, name='company_id')
 
-        # 5. Question Matrix (1-5 Scale)
-        q_matrix = grouped_questions.pivot_table(
-            index='company_id', 
-            columns='question_id', 
-            values='score_1to5', 
-            aggfunc='mean'
-        ).fillna(1.0)
+        # 4. Question Matrix (1-5 Scale), only questions answered by at least one company
+        answered_q = scores['question_answered'].any(axis=0)
+        q_matrix = pd.DataFrame(
+            scores['question_scores'][:, answered_q],
+            index=company_index,
+            columns=pd.Index(engine.question_ids[answered_q], name='question_id')
+        )
 
-        # 6. Dimension Matrix (Weighted Average -> 1-5 Scale)
-        dim_groups = grouped_questions.groupby(['company_id', 'dimension_name'])
-        
-        dim_results = dim_groups.apply(
-            lambda x: (x['question_score_contrib'].sum() / (x['question_weight'].sum() / 100)) * 4 + 1 if x['question_weight'].sum() > 0 else 1.0
-        ).reset_index(name='dimension_score')
-        
-        d_matrix = dim_results.pivot_table(
-            index='company_id', 
-            columns='dimension_name', 
-            values='dimension_score'
-        ).fillna(1.0)
-        
-        if 'General Psychology' in d_matrix.columns:
-            d_matrix = d_matrix.drop(columns=['General Psychology'])
-        
-        # 7. Metadata 
+        # 5. Dimension Matrix (Weighted Average -> 1-5 Scale), 'General Psychology' excluded
+        answered_d = np.isin(engine.feature_index, engine.question_dims[answered_q])
+        d_matrix = pd.DataFrame(
+            scores['feature_scores'][:, answered_d],
+            index=company_index,
+            columns=pd.Index([d for d, keep in zip(engine.feature_dimensions, answered_d) if keep], name='dimension_name')
+        )
+        
+        # 6. Metadata 
         q_meta = self.get_question_metadata(dfs)
         
         return q_matrix, d_matrix, dfs.get('cluster_profiles', pd.DataFrame()), q_meta
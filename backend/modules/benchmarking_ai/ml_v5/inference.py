@@ -2,6 +2,7 @@
 import pandas as pd
 import os
 from benchmarking_ai.ml_v5.models import ClusterEngine, StrategicGapAnalyzer, RoadmapGenerator
+from benchmarking_ai.ml_v5.artifacts import has_bundle, load_bundle, pickle_artifacts_version
 from benchmarking_ai.ml_v5.utils import generate_narrative_template
 
 class InferenceEngine:
@@ -18,11 +19,18 @@ class InferenceEngine:
         self.ce = ClusterEngine()
         self.sga = StrategicGapAnalyzer()
         self.rg = RoadmapGenerator()
+        self.model_version = None
         
         try:
-            self.ce.load_model(path)
-            self.sga.load_model(path)
-            self.rg.load_model(path)
+            if has_bundle(path):
+                # Pickle-free, memory-mapped (see artifacts.py)
+                manifest = load_bundle(path, self.ce, self.sga, self.rg)
+                self.model_version = manifest["model_version"]
+            else:
+                self.ce.load_model(path)
+                self.sga.load_model(path)
+                self.rg.load_model(path)
+                self.model_version = pickle_artifacts_version(path)
             self.loaded = True
             
             # Debug: Print expected columns from RoadmapGenerator
@@ -45,10 +53,8 @@ class InferenceEngine:
         if not self.loaded:
             return {"error": "Models not loaded"}
         
-        # 1. Cluster Prediction
-        # Series to DataFrame (row) for scaler
-        df_input = company_dim_series.to_frame().T 
-        c_ids, c_names, coords = self.ce.predict(df_input)
+        # 1. Cluster Prediction (compiled NumPy path, see ClusterEngine.compile)
+        c_ids, c_names, coords = self.ce.predict(company_dim_series)
         
         # Extract Semantic ID from name (e.g. "5 - Leader" -> 5) to match frontend expectation
         raw_name = c_names[0]
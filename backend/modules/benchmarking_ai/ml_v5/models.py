@@ -4,22 +4,51 @@ import numpy as np
 import pickle
 import json
 import os
-from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
-from sklearn.preprocessing import StandardScaler
-from sklearn.neighbors import NearestNeighbors
-from scipy.stats import zscore
 from benchmarking_ai.ml_v5.utils import RISK_PAIRS, PHASE_MAPPING
 
+class PercentileIndex:
+    """
+    total_maturity of the benchmark population, sorted per industry and globally,
+    so a percentile query is one np.searchsorted (O(log n)) instead of a scan of industry_data.
+    """
+    MIN_GROUP_SIZE = 5 # Smaller industries are benchmarked against the global population
+
+    def __init__(self, global_scores, industry_scores):
+        self.global_scores = global_scores # sorted total_maturity of all companies
+        self.industry_scores = industry_scores # {industry: sorted total_maturity}
+
+    @classmethod
+    def from_frame(cls, industry_data):
+        """industry_data: DataFrame with industry and total_maturity columns."""
+        scores = industry_data['total_maturity'].to_numpy(dtype=np.float64)
+        positions = industry_data.groupby('industry', sort=False).indices
+        return cls(np.sort(scores), {name: np.sort(scores[idx]) for name, idx in positions.items()})
+
+    def benchmark(self, industry):
+        """Returns (group name, sorted scores) to rank a company of this industry against."""
+        scores = self.industry_scores.get(industry)
+        if scores is None or len(scores) < self.MIN_GROUP_SIZE:
+            return "Global", self.global_scores
+        return industry, scores
+
+    @staticmethod
+    def lower_counts(sorted_scores, values):
+        """Number of scores strictly below each value; a NaN value has none."""
+        counts = np.searchsorted(sorted_scores, values, side='left')
+        return np.where(np.isnan(values), 0, counts)
+
 class ClusterEngine:
     def __init__(self, n_clusters=5):
         self.n_clusters = n_clusters
+        # Fitted estimators: sklearn after fit()/load_model(), NumPy equivalents when loaded from an artifact bundle
         self.model = None
-        self.scaler = StandardScaler()
-        self.pca = PCA(n_components=2)
+        self.scaler = None
+        self.pca = None
         self.profiles = None 
         self.labels_map = {}
         self.industry_data = None  # Store for percentile calculation
+        self.percentile_index = None # Presorted scores for percentile queries, see PercentileIndex
+        self._compiled = None # Plain arrays for predict(), see compile()
 
     def fit(self, data, cluster_profiles=None, industry_data=None):
         """
@@ -30,9 +59,17 @@ class ClusterEngine:
             cluster_profiles: Optional cluster profile metadata
             industry_data: Optional DataFrame with company_id, industry, total_maturity columns
         """
+        # sklearn is only needed for training (see artifacts.py for loading without it)
+        from sklearn.cluster import KMeans
+        from sklearn.decomposition import PCA
+        from sklearn.preprocessing import StandardScaler
+
         self.profiles = cluster_profiles
         self.industry_data = industry_data  # Store for percentile calculation
+        self.build_percentile_index()
         
+        self.scaler = StandardScaler()
+        self.pca = PCA(n_components=2)
         X = self.scaler.fit_transform(data.fillna(0))
         
         self.model = KMeans(n_clusters=self.n_clusters, random_state=42)
@@ -40,6 +77,7 @@ class ClusterEngine:
         self.pca.fit(X)
         
         self._build_label_map(data, self.model.labels_)
+        self.compile()
 
     def _build_label_map(self, data, labels):
         df = data.copy()
@@ -67,7 +105,75 @@ class ClusterEngine:
                  name = hybrid_names[min(rank_idx, 4)]
                  self.labels_map[cluster_idx] = name
 
+    def compile(self):
+        """
+        Extracts the fitted parameters into plain arrays so predict() is a few lines of NumPy
+        instead of three sklearn calls with per-call input validation. Called after fit()/load.
+        Performs the same floating point operations in the same order as sklearn
+        (bit-identical, see test_cluster_parity.py).
+        """
+        scaler, model, pca = self.scaler, self.model, self.pca
+        if getattr(pca, "whiten", False):
+            raise ValueError("Compiled ClusterEngine does not support whitened PCA")
+        mean = scaler.mean_ if getattr(scaler, "with_mean", True) else None
+        scale = scaler.scale_ if getattr(scaler, "with_std", True) else None
+        features = getattr(scaler, "feature_names_in_", None)
+        centers = np.asarray(model.cluster_centers_, dtype=np.float64)
+        components = np.asarray(pca.components_, dtype=np.float64)
+
+        self._compiled = {
+            "features": pd.Index(features) if features is not None else None,
+            "mean": mean,
+            "scale": scale,
+            # Transposed views (not copies): same memory layout, hence same BLAS kernel, as sklearn
+            "centers_t": centers.T,
+            "centers_sq": np.einsum("ij,ij->i", centers, centers),
+            "components_t": components.T,
+            "projected_mean": np.asarray(pca.mean_, dtype=np.float64).reshape(1, -1) @ components.T
+        }
+
     def predict(self, company_df):
+        """
+        company_df: DataFrame (one row per company, dimension columns), a Series of one
+        company's dimension scores, or a 2D array in training column order.
+        Returns (cluster_ids, names, 2D PCA coordinates).
+        """
+        c = self._compiled
+        if c is None:
+            return self.predict_sklearn(company_df)
+
+        features = c["features"]
+        if hasattr(company_df, "columns"):
+            if features is not None:
+                company_df = company_df[features]
+            X = company_df.fillna(0).to_numpy(dtype=np.float64, copy=True)
+        else:
+            if hasattr(company_df, "index"):
+                # Series (the per-request case): skips building a one-row DataFrame
+                if features is not None and not company_df.index.equals(features):
+                    company_df = company_df.reindex(features)
+                company_df = company_df.to_numpy(dtype=np.float64)
+            X = np.array(company_df, dtype=np.float64, ndmin=2)
+            X[np.isnan(X)] = 0.0
+
+        # StandardScaler.transform
+        if c["mean"] is not None:
+            X -= c["mean"]
+        if c["scale"] is not None:
+            X /= c["scale"]
+
+        # KMeans.predict: argmin ||x - c||^2 = argmin (||c||^2 - 2 x.c), as in sklearn's Lloyd kernel
+        cluster_ids = (c["centers_sq"] - 2.0 * (X @ c["centers_t"])).argmin(axis=1).astype(np.int32)
+
+        # PCA.transform: project, then subtract the projected mean
+        coords = X @ c["components_t"]
+        coords -= c["projected_mean"]
+
+        names = [self.labels_map.get(cid, f"Cluster {cid}") for cid in cluster_ids.tolist()]
+        return cluster_ids, names, coords
+
+    def predict_sklearn(self, company_df):
+        """Reference path through the fitted estimators (used for parity checks)."""
         X_new = self.scaler.transform(company_df.fillna(0))
         cluster_ids = self.model.predict(X_new)
         coords = self.pca.transform(X_new)
@@ -76,6 +182,20 @@ class ClusterEngine:
         
         return cluster_ids, names, coords
     
+    def build_percentile_index(self):
+        """Sorts industry_data once, after fit()/load; percentile queries then never touch the DataFrame."""
+        self.percentile_index = PercentileIndex.from_frame(self.industry_data) if self.industry_data is not None else None
+
+    @staticmethod
+    def _percentile_result(lower_count, sample_size, benchmark_group):
+        percentile = (lower_count / sample_size) * 100
+        return {
+            'percentile_value': f"{percentile:.2f}",
+            'percentage': f"{max(1, 100 - percentile):.0f}",  # Inverted for "Top X%" logic
+            'industry': benchmark_group,
+            'industry_sample_size': sample_size
+        }
+
     def calculate_industry_percentile(self, company_total_maturity, company_industry):
         """
         Calculate industry-specific percentile ranking.
@@ -87,34 +207,49 @@ class ClusterEngine:
         Returns:
             dict with percentile_value, percentage, industry, and industry_sample_size
         """
-        if self.industry_data is None:
+        if self.percentile_index is None:
             return None
         
-        # Filter to same industry
-        industry_companies = self.industry_data[
-            self.industry_data['industry'] == company_industry
-        ]
-        
-        benchmark_group = company_industry
-        
-        # Fallback to Global if industry sample is too small (< 5)
-        if len(industry_companies) < 5:
-            industry_companies = self.industry_data
-            benchmark_group = "Global"
-        
-        if len(industry_companies) == 0:
+        # Industry peers, or Global if the industry sample is too small (< 5)
+        benchmark_group, scores = self.percentile_index.benchmark(company_industry)
+        if len(scores) == 0:
             return None
         
         # Calculate percentile (percentage of companies with lower score)
-        lower_count = (industry_companies['total_maturity'] < company_total_maturity).sum()
-        percentile = (lower_count / len(industry_companies)) * 100
+        lower_count = self.percentile_index.lower_counts(scores, np.float64(company_total_maturity))
+        return self._percentile_result(lower_count, len(scores), benchmark_group)
+
+    def calculate_industry_percentiles(self, company_total_maturities, company_industries):
+        """
+        Batch variant of calculate_industry_percentile: one searchsorted per industry
+        for any number of companies.
         
-        return {
-            'percentile_value': f"{percentile:.2f}",
-            'percentage': f"{max(1, 100 - percentile):.0f}",  # Inverted for "Top X%" logic
-            'industry': benchmark_group,
-            'industry_sample_size': len(industry_companies)
-        }
+        Args:
+            company_total_maturities: Sequence of total maturity scores
+            company_industries: Sequence of industries, same length
+            
+        Returns:
+            list with one calculate_industry_percentile result (dict or None) per company
+        """
+        scores = np.asarray(company_total_maturities, dtype=np.float64)
+        industries = list(company_industries)
+        if len(scores) != len(industries):
+            raise ValueError("company_total_maturities and company_industries differ in length")
+        results = [None] * len(industries)
+        if self.percentile_index is None:
+            return results
+        
+        rows_by_industry = {}
+        for row, industry in enumerate(industries):
+            rows_by_industry.setdefault(industry, []).append(row)
+        for industry, rows in rows_by_industry.items():
+            benchmark_group, group_scores = self.percentile_index.benchmark(industry)
+            if len(group_scores) == 0:
+                continue
+            lower_counts = self.percentile_index.lower_counts(group_scores, scores[rows])
+            for row, lower_count in zip(rows, lower_counts):
+                results[row] = self._percentile_result(lower_count, len(group_scores), benchmark_group)
+        return results
 
     def save_model(self, path_prefix):
         with open(f"{path_prefix}_kmeans.pkl", 'wb') as f:
@@ -143,6 +278,8 @@ class ClusterEngine:
         industry_path = f"{path_prefix}_industry_data.pkl"
         if os.path.exists(industry_path):
             self.industry_data = pd.read_pickle(industry_path)
+        self.build_percentile_index()
+        self.compile()
 
 class StrategicGapAnalyzer:
     def __init__(self):
@@ -385,7 +522,7 @@ class StrategicGapAnalyzer:
 class RoadmapGenerator:
     def __init__(self):
         self.knn = None
-        self.scaler = StandardScaler()
+        self.scaler = None
         self.dim_data_train = None # Store for looking up peers
         self.question_data_train = None # Store for looking up peer question scores (aggregated)
         
@@ -394,6 +531,9 @@ class RoadmapGenerator:
         dim_data: Index=Company, Cols=Dimensions (may include 'industry' column)
         question_data_agg: Index=Company, Cols=Questions (Scores) - Used to find peer strengths
         """
+        from sklearn.neighbors import NearestNeighbors
+        from sklearn.preprocessing import StandardScaler
+
         self.dim_data_train = dim_data.copy().fillna(0)
         self.dim_data_train['total_maturity'] = self.dim_data_train[[c for c in self.dim_data_train.columns if c != 'industry']].mean(axis=1)
         
@@ -404,6 +544,7 @@ class RoadmapGenerator:
         self.question_data_train = question_data_agg.copy().fillna(0)
         
         # Prepare features for KNN (exclude total_maturity and industry)
+        self.scaler = StandardScaler()
         X = self.scaler.fit_transform(self.dim_data_train[dim_cols])
         
         self.knn = NearestNeighbors(n_neighbors=15, metric='cosine')
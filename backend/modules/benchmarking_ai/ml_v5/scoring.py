@@ -0,0 +1,239 @@
+import itertools
+import numpy as np
+
+UNKNOWN_DIMENSION = "Unknown Dimension"
+EXCLUDED_DIMENSIONS = ("General Psychology",)
+
+
+class ScoringEngine:
+    """
+    Compiled scoring kernel for the AI-Compass maturity formula.
+
+    Question ratio  = selected weight / (total weight for Checklist, max weight otherwise), clamped to 1.0
+    Question score  = ratio * question_weight / 100  ->  1-5 scale: (score / (weight / 100)) * 4 + 1
+    Dimension score = (SUM(score) / (SUM(weight) / 100)) * 4 + 1, 1.0 if the dimension has no weight
+
+    The reference tables are compiled once into flat NumPy arrays. Responses are scored in CSR
+    form (score_csr) with a couple of searchsorted / bincount calls and no DataFrame round trips;
+    score() and score_batch() are thin wrappers over the same kernel.
+    """
+
+    def __init__(self, questions, answers, dimensions, excluded_dimensions=EXCLUDED_DIMENSIONS):
+        """
+        Args:
+            questions: iterable of dicts with question_id, dimension_id, type, weight
+            answers: iterable of dicts with answer_id, question_id, answer_weight
+            dimensions: iterable of dicts with dimension_id, dimension_name
+            excluded_dimensions: dimension names left out of the ML feature vector
+        """
+        questions = list(questions)
+        answers = list(answers)
+        dimensions = list(dimensions)
+
+        # Per-question answer stats (NULL weights are ignored, as in pandas sum/max)
+        weights_by_q = {}
+        for a in answers:
+            w = a.get("answer_weight")
+            if w is not None and w == w:
+                weights_by_q.setdefault(a["question_id"], []).append(float(w))
+
+        # Only questions with at least one weighted answer can be scored
+        scorable = sorted(
+            (q for q in questions if q["question_id"] in weights_by_q),
+            key=lambda q: q["question_id"]
+        )
+
+        # Dimensions are grouped by name (sorted), matching groupby('dimension_name')
+        dim_name_by_id = {d["dimension_id"]: d["dimension_name"] for d in dimensions}
+        names = set(dim_name_by_id.values())
+        if any(q.get("dimension_id") not in dim_name_by_id for q in scorable):
+            names.add(UNKNOWN_DIMENSION)
+        self.dimension_names = sorted(names)
+        dim_pos = {name: i for i, name in enumerate(self.dimension_names)}
+
+        self.feature_dimensions = [d for d in self.dimension_names if d not in excluded_dimensions and d != UNKNOWN_DIMENSION]
+        self.feature_index = np.array([dim_pos[d] for d in self.feature_dimensions], dtype=np.int64)
+
+        n_q = len(scorable)
+        self.question_ids = np.array([q["question_id"] for q in scorable], dtype=np.int64)
+        self.question_weights = np.empty(n_q, dtype=np.float64)
+        self.question_denoms = np.empty(n_q, dtype=np.float64)
+        self.total_weights = np.empty(n_q, dtype=np.float64)
+        self.max_weights = np.empty(n_q, dtype=np.float64)
+        self.question_dims = np.empty(n_q, dtype=np.int64)
+
+        for i, q in enumerate(scorable):
+            weights = weights_by_q[q["question_id"]]
+            self.total_weights[i] = sum(weights)
+            self.max_weights[i] = max(weights)
+            is_checklist = (q.get("type") or "").lower() == "checklist"
+            self.question_denoms[i] = self.total_weights[i] if is_checklist else self.max_weights[i]
+
+            qw = q.get("weight")
+            self.question_weights[i] = 1.0 if qw is None or qw != qw else float(qw)
+            self.question_dims[i] = dim_pos[dim_name_by_id.get(q.get("dimension_id"), UNKNOWN_DIMENSION)]
+
+        # Answers, sorted by id: owning question position (-1 if unscorable) and weight (NULL -> 0)
+        answers = sorted(answers, key=lambda a: a["answer_id"])
+        self.answer_ids = np.array([a["answer_id"] for a in answers], dtype=np.int64)
+        self.answer_qpos = self._lookup(self.question_ids, np.array([a["question_id"] for a in answers], dtype=np.int64))
+        self.answer_weights = np.array([a.get("answer_weight") for a in answers], dtype=np.float64)
+        self.answer_weights = np.nan_to_num(self.answer_weights, nan=0.0)
+
+    @staticmethod
+    def _lookup(keys, values):
+        """Positions of values in the sorted keys array, -1 where absent."""
+        if len(keys) == 0:
+            return np.full(len(values), -1, dtype=np.int64)
+        pos = np.searchsorted(keys, values)
+        pos = np.minimum(pos, len(keys) - 1)
+        return np.where(keys[pos] == values, pos, -1)
+
+    @staticmethod
+    def to_csr(responses):
+        """
+        Packs responses into CSR arrays.
+
+        Args:
+            responses: list of item lists; each item is a dict with question_id and answers
+
+        Returns:
+            (item_offsets, item_question_ids, answer_offsets, answer_ids) as accepted by score_csr()
+        """
+        items = list(itertools.chain.from_iterable(responses))
+        n_items = len(items)
+
+        item_offsets = np.zeros(len(responses) + 1, dtype=np.int64)
+        np.cumsum([len(r) for r in responses], out=item_offsets[1:])
+
+        item_question_ids = np.fromiter((it["question_id"] for it in items), dtype=np.int64, count=n_items)
+        answer_counts = np.fromiter((len(it["answers"] or ()) for it in items), dtype=np.int64, count=n_items)
+        answer_offsets = np.zeros(n_items + 1, dtype=np.int64)
+        np.cumsum(answer_counts, out=answer_offsets[1:])
+
+        answer_ids = np.fromiter(
+            itertools.chain.from_iterable(it["answers"] or () for it in items),
+            dtype=np.int64, count=int(answer_offsets[-1])
+        )
+        return item_offsets, item_question_ids, answer_offsets, answer_ids
+
+    def score_csr(self, item_offsets, item_question_ids, answer_offsets, answer_ids):
+        """
+        Scores N responses in one vectorized pass. Cost is linear in the number of answers.
+
+        Args:
+            item_offsets: (n_responses + 1,) items of response r are item_question_ids[item_offsets[r]:item_offsets[r + 1]]
+            item_question_ids: (n_items,) question_id per item
+            answer_offsets: (n_items + 1,) answers of item i are answer_ids[answer_offsets[i]:answer_offsets[i + 1]]
+            answer_ids: (n_answers,) selected answer_ids
+
+        Returns:
+            dict of dense matrices (rows follow the responses, columns self.question_ids / self.dimension_names)
+              question_answered      (n, n_questions) bool
+              sum_selected_weight    (n, n_questions)
+              ratio                  (n, n_questions) clamped ratio, 0 where unanswered
+              question_score_contrib (n, n_questions) 0 where unanswered
+              question_scores        (n, n_questions) score_1to5, 1.0 where unanswered
+              dimension_scores       (n, n_dimensions) 1.0 where nothing was answered
+              dimension_weights      (n, n_dimensions) SUM(question_weight) of answered questions
+              dimension_counts       (n, n_dimensions) number of answered questions
+              feature_scores         (n, n_features) per self.feature_dimensions
+        """
+        item_offsets = np.asarray(item_offsets, dtype=np.int64)
+        item_question_ids = np.asarray(item_question_ids, dtype=np.int64)
+        answer_offsets = np.asarray(answer_offsets, dtype=np.int64)
+        answer_ids = np.asarray(answer_ids, dtype=np.int64)
+
+        n = len(item_offsets) - 1
+        n_q = len(self.question_ids)
+        n_d = len(self.dimension_names)
+
+        # 1. Flat (response, question) cell per item; -1 for unscorable questions
+        item_resp = np.repeat(np.arange(n, dtype=np.int64), np.diff(item_offsets))
+        item_qpos = self._lookup(self.question_ids, item_question_ids)
+        item_cell = np.where(item_qpos >= 0, item_resp * n_q + item_qpos, -1)
+
+        answered = np.zeros(n * n_q, dtype=bool)
+        answered[item_cell[item_cell >= 0]] = True
+
+        # 2. Selected weight per cell (answers must belong to the item's question)
+        answer_item = np.repeat(np.arange(len(item_question_ids), dtype=np.int64), np.diff(answer_offsets))
+        answer_cell = item_cell[answer_item]
+        answer_qpos = item_qpos[answer_item]
+        apos = self._lookup(self.answer_ids, answer_ids)
+        valid = (apos >= 0) & (answer_cell >= 0)
+        valid[valid] = self.answer_qpos[apos[valid]] == answer_qpos[valid]
+
+        selected = np.bincount(answer_cell[valid], weights=self.answer_weights[apos[valid]], minlength=n * n_q)
+        selected = selected.reshape(n, n_q)
+        answered = answered.reshape(n, n_q)
+
+        # 3. Question ratios and contributions
+        qw = self.question_weights
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(self.question_denoms > 0, selected / self.question_denoms, 0.0)
+            ratio = np.minimum(1.0, ratio)
+            contrib = (ratio * qw) / 100
+            question_scores = (contrib / (qw / 100)) * 4 + 1
+        question_scores = np.where(answered & ~np.isnan(question_scores), question_scores, 1.0)
+        ratio = np.where(answered, ratio, 0.0)
+        contrib = np.where(answered, contrib, 0.0)
+
+        # 4. Dimension mastery, summed per (response, dimension) cell
+        dim_cell = (np.arange(n, dtype=np.int64)[:, None] * n_d + self.question_dims[None, :])[answered]
+        dim_contrib = np.bincount(dim_cell, weights=contrib[answered], minlength=n * n_d).reshape(n, n_d)
+        dim_weight = np.bincount(dim_cell, weights=np.broadcast_to(qw, (n, n_q))[answered], minlength=n * n_d).reshape(n, n_d)
+        dim_count = np.bincount(dim_cell, minlength=n * n_d).reshape(n, n_d)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dim_scores = np.where(dim_weight > 0, (dim_contrib / (dim_weight / 100)) * 4 + 1, 1.0)
+
+        return {
+            "question_answered": answered,
+            "sum_selected_weight": selected,
+            "ratio": ratio,
+            "question_score_contrib": contrib,
+            "question_scores": question_scores,
+            "dimension_scores": dim_scores,
+            "dimension_weights": dim_weight,
+            "dimension_counts": dim_count,
+            "feature_scores": dim_scores[:, self.feature_index]
+        }
+
+    def score_batch(self, responses):
+        """
+        Scores many responses (list of item lists, see score()) into dense matrices.
+        Convenience wrapper around to_csr() + score_csr().
+        """
+        return self.score_csr(*self.to_csr(responses))
+
+    def score(self, items):
+        """
+        Scores a single response.
+
+        Args:
+            items: list of dicts with question_id and answers (list of answer_ids, may be empty/None)
+
+        Returns:
+            dict with
+              question_index  positions of the answered, scorable questions (sorted by question_id)
+              question_ids, sum_selected_weight, ratio, question_score_contrib, score_1to5  (per answered question)
+              dimension_scores  1-5 score per self.dimension_names (1.0 where nothing was answered)
+              dimension_weights SUM(question_weight) per self.dimension_names
+              dimension_counts  number of answered questions per self.dimension_names
+              feature_scores    dimension_scores aligned with self.feature_dimensions
+        """
+        batch = self.score_batch([items])
+        q_index = np.flatnonzero(batch["question_answered"][0])
+
+        return {
+            "question_index": q_index,
+            "question_ids": self.question_ids[q_index],
+            "sum_selected_weight": batch["sum_selected_weight"][0, q_index],
+            "ratio": batch["ratio"][0, q_index],
+            "question_score_contrib": batch["question_score_contrib"][0, q_index],
+            "score_1to5": batch["question_scores"][0, q_index],
+            "dimension_scores": batch["dimension_scores"][0],
+            "dimension_weights": batch["dimension_weights"][0],
+            "dimension_counts": batch["dimension_counts"][0],
+            "feature_scores": batch["feature_scores"][0]
+        }
@@ -0,0 +1,93 @@
+"""
+Integrity test for the ml_v5 artifact bundle: load_bundle must refuse a bundle whose
+arrays do not match the sha1 / dtype / shape recorded in its manifest.
+
+Usage (from backend/modules):
+    python -m benchmarking_ai.ml_v5.test_artifacts
+    python -m pytest benchmarking_ai/ml_v5/test_artifacts.py
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from benchmarking_ai.ml_v5.models import ClusterEngine, StrategicGapAnalyzer, RoadmapGenerator
+from benchmarking_ai.ml_v5.artifacts import bundle_dir, has_bundle, load_bundle, MANIFEST
+
+PATH_PREFIX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_artifacts", "v5")
+
+
+def _copy_bundle(tmp):
+    prefix = os.path.join(tmp, "v5")
+    shutil.copytree(bundle_dir(PATH_PREFIX), bundle_dir(prefix))
+    with open(os.path.join(bundle_dir(prefix), MANIFEST), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    return prefix, manifest
+
+
+def _load(prefix):
+    return load_bundle(prefix, ClusterEngine(), StrategicGapAnalyzer(), RoadmapGenerator())
+
+
+def _assert_rejected(prefix):
+    try:
+        _load(prefix)
+    except ValueError:
+        return
+    raise AssertionError("Corrupt bundle was loaded")
+
+
+def test_intact_bundle_loads():
+    if not has_bundle(PATH_PREFIX):
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        prefix, manifest = _copy_bundle(tmp)
+        assert _load(prefix)["model_version"] == manifest["model_version"]
+
+
+def test_corrupt_array_rejected():
+    if not has_bundle(PATH_PREFIX):
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        prefix, manifest = _copy_bundle(tmp)
+        entry = manifest["arrays"]["cluster_centers"]
+        path = os.path.join(bundle_dir(prefix), entry["file"])
+        # Same dtype and shape, different values
+        centers = np.load(path)
+        centers[0, 0] += 1.0
+        np.save(path, centers)
+        _assert_rejected(prefix)
+
+
+def test_swapped_array_rejected():
+    if not has_bundle(PATH_PREFIX):
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        prefix, manifest = _copy_bundle(tmp)
+        arrays = manifest["arrays"]
+        # Two arrays of the same dtype and shape: only the hashes tell them apart
+        directory = bundle_dir(prefix)
+        a, b = arrays["cluster_scaler_mean"]["file"], arrays["cluster_scaler_scale"]["file"]
+        os.replace(os.path.join(directory, a), os.path.join(directory, "swap.npy"))
+        os.replace(os.path.join(directory, b), os.path.join(directory, a))
+        os.replace(os.path.join(directory, "swap.npy"), os.path.join(directory, b))
+        _assert_rejected(prefix)
+
+
+def test_truncated_array_rejected():
+    if not has_bundle(PATH_PREFIX):
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        prefix, manifest = _copy_bundle(tmp)
+        path = os.path.join(bundle_dir(prefix), manifest["arrays"]["knn_fit_X"]["file"])
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) // 2)
+        _assert_rejected(prefix)
+
+
+if __name__ == "__main__":
+    for test in (test_intact_bundle_loads, test_corrupt_array_rejected, test_swapped_array_rejected,
+                 test_truncated_array_rejected):
+        test()
+        print(f"{test.__name__}: OK")
@@ -0,0 +1,122 @@
+"""
+Parity test: the compiled ClusterEngine.predict (plain NumPy) must be bit-identical
+to the sklearn path (StandardScaler -> KMeans.predict -> PCA.transform) on the training set,
+both for the whole population at once and for the one-row calls made per request.
+The presorted percentile lookup must return exactly what the DataFrame scan returned.
+
+Usage (from backend/modules):
+    python -m benchmarking_ai.ml_v5.test_cluster_parity
+    python -m pytest benchmarking_ai/ml_v5/test_cluster_parity.py
+"""
+
+import os
+import warnings
+import numpy as np
+from benchmarking_ai.ml_v5.models import ClusterEngine, StrategicGapAnalyzer, RoadmapGenerator
+from benchmarking_ai.ml_v5.artifacts import has_bundle, load_bundle
+
+PATH_PREFIX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_artifacts", "v5")
+
+
+def _load():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore") # sklearn version mismatch of the pickles
+        ce = ClusterEngine()
+        ce.load_model(PATH_PREFIX)
+        rg = RoadmapGenerator()
+        rg.load_model(PATH_PREFIX)
+    dims = [c for c in rg.dim_data_train.columns if c not in ("total_maturity", "industry")]
+    return ce, rg.dim_data_train[dims]
+
+
+def _assert_same(expected, actual):
+    e_ids, e_names, e_coords = expected
+    a_ids, a_names, a_coords = actual
+    assert np.array_equal(np.asarray(e_ids), np.asarray(a_ids))
+    assert list(e_names) == list(a_names)
+    assert e_coords.dtype == a_coords.dtype and np.array_equal(e_coords, a_coords), \
+        f"max abs diff {np.abs(e_coords - a_coords).max()}"
+
+
+def test_batch_parity():
+    ce, train = _load()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        expected = ce.predict_sklearn(train)
+    _assert_same(expected, ce.predict(train))
+
+
+def test_single_row_parity():
+    ce, train = _load()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for i in range(len(train)):
+            row = train.iloc[[i]]
+            expected = ce.predict_sklearn(row)
+            _assert_same(expected, ce.predict(row))
+            # Series input, as passed by InferenceEngine.run_analysis
+            _assert_same(expected, ce.predict(train.iloc[i]))
+
+
+def _percentile_reference(industry_data, company_total_maturity, company_industry):
+    """The original DataFrame implementation of ClusterEngine.calculate_industry_percentile."""
+    industry_companies = industry_data[industry_data['industry'] == company_industry]
+    benchmark_group = company_industry
+    if len(industry_companies) < 5:
+        industry_companies = industry_data
+        benchmark_group = "Global"
+    if len(industry_companies) == 0:
+        return None
+    lower_count = (industry_companies['total_maturity'] < company_total_maturity).sum()
+    percentile = (lower_count / len(industry_companies)) * 100
+    return {
+        'percentile_value': f"{percentile:.2f}",
+        'percentage': f"{max(1, 100 - percentile):.0f}",
+        'industry': benchmark_group,
+        'industry_sample_size': len(industry_companies)
+    }
+
+
+def _assert_percentile_parity(ce, industry_data):
+    scores = industry_data["total_maturity"].tolist() # Ties with every benchmark score
+    scores += [-1.0, 0.0, 2.5, 100.0, float("nan")]
+    industries = list(industry_data["industry"].dropna().unique()) + ["Unknown", None]
+    for industry in industries:
+        expected = [_percentile_reference(industry_data, score, industry) for score in scores]
+        assert [ce.calculate_industry_percentile(score, industry) for score in scores] == expected, industry
+        assert ce.calculate_industry_percentiles(scores, [industry] * len(scores)) == expected, industry
+
+
+def test_percentile_parity():
+    ce, _ = _load()
+    _assert_percentile_parity(ce, ce.industry_data)
+
+    # Industries below 5 companies fall back to Global
+    industry_data = ce.industry_data
+    small = industry_data["industry"].value_counts().index[-1]
+    trimmed = industry_data.drop(industry_data.index[industry_data["industry"] == small][3:])
+    ce.industry_data = trimmed
+    ce.build_percentile_index()
+    assert ce.calculate_industry_percentile(3.0, small)["industry"] == "Global"
+    _assert_percentile_parity(ce, trimmed)
+
+    ce.industry_data = trimmed.iloc[:0]
+    ce.build_percentile_index()
+    assert ce.calculate_industry_percentile(3.0, small) is None
+    assert ce.calculate_industry_percentiles([3.0], [small]) == [None]
+
+
+def test_bundle_parity():
+    if not has_bundle(PATH_PREFIX):
+        return
+    ce, train = _load()
+    bundled = ClusterEngine()
+    load_bundle(PATH_PREFIX, bundled, StrategicGapAnalyzer(), RoadmapGenerator())
+    _assert_same(ce.predict(train), bundled.predict(train))
+    _assert_percentile_parity(bundled, ce.industry_data)
+
+
+if __name__ == "__main__":
+    for test in (test_batch_parity, test_single_row_parity, test_percentile_parity, test_bundle_parity):
+        test()
+        print(f"{test.__name__}: OK")
@@ -3,6 +3,7 @@ import os
 import pandas as pd
 from benchmarking_ai.ml_v5.data_pipeline import DataPipeline
 from benchmarking_ai.ml_v5.models import ClusterEngine, StrategicGapAnalyzer, RoadmapGenerator
+from benchmarking_ai.ml_v5.artifacts import save_bundle, pickle_artifacts_version
 
 def train_and_save():
     print("Starting Training Pipeline [ML v5]...")
@@ -51,6 +52,10 @@ def train_and_save():
     rg.save_model(f"{output_dir}/v5")
     print("Roadmap Generator trained and saved.")
     
+    # 5. Pickle-free bundle (what the API loads), stamped with the version of the pickles above
+    save_bundle(f"{output_dir}/v5", ce, sga, rg, pickle_artifacts_version(f"{output_dir}/v5"))
+    print("Artifact bundle saved.")
+    
     print("All ML v5 models successfully trained.")
 
 if __name__ == "__main__":
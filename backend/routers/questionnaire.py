@@ -1,22 +1,101 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from typing import List
-from database import get_db
-from models import Question, Answer
+import gzip
+import hashlib
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from database import get_db, get_async_db
+from config import get_settings
 from schemas import questionnaire as schemas
+from services.reference_data import reference_data_cache, ReferenceData
 
 router = APIRouter()
 
-@router.get("/", response_model=schemas.Questionnaire)
-def get_questionnaire(db: Session = Depends(get_db)):
+class QuestionnairePayload:
+    """The serialized questionnaire of one reference data snapshot."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.etag_gzip = f'"{digest}-gz"'
+
+def _build_payload(ref: ReferenceData) -> QuestionnairePayload:
+    questions = [
+        {**q, "answers": ref.answers_by_question.get(q["question_id"], [])}
+        for q in ref.questions
+    ]
+    # Validated through the same schema as the response_model, so the JSON is identical
+    return QuestionnairePayload(schemas.Questionnaire(questions=questions).model_dump_json().encode("utf-8"))
+
+def _etag_matches(if_none_match: Optional[str], payload: QuestionnairePayload) -> bool:
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in ("*", payload.etag, payload.etag_gzip):
+            return True
+    return False
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Whether Accept-Encoding allows gzip: listed (or "*") with a q-value above 0 ("gzip;q=0" refuses it)."""
+    gzip_q = any_q = None
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        coding = coding.strip().lower()
+        if coding in ("gzip", "x-gzip"):
+            gzip_q = q
+        elif coding == "*":
+            any_q = q
+    if gzip_q is not None:
+        return gzip_q > 0
+    return any_q is not None and any_q > 0
+
+def _questionnaire_response(request: Request, ref: ReferenceData) -> Response:
+    payload = ref.derived("questionnaire", _build_payload)
+    use_gzip = get_settings().QUESTIONNAIRE_GZIP and _accepts_gzip(request.headers.get("accept-encoding", ""))
+
+    headers = {
+        "ETag": payload.etag_gzip if use_gzip else payload.etag,
+        "Cache-Control": "no-cache", # Always revalidate; unchanged data costs a 304
+        "Vary": "Accept-Encoding"
+    }
+    if _etag_matches(request.headers.get("if-none-match"), payload):
+        return Response(status_code=304, headers=headers)
+
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=payload.gzipped, media_type="application/json", headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+def get_questionnaire(request: Request, db: Session = Depends(get_db)):
     """
     Fetch the full questionnaire with all questions, answers, and dimensions.
+    Served from the reference data cache as pre-serialized JSON; a new snapshot
+    (seed / translation sync) yields a new ETag.
+    """
+    return _questionnaire_response(request, reference_data_cache.get(db))
+
+async def get_questionnaire_async(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Async variant of get_questionnaire (see DB_ASYNC_ENDPOINTS).
     """
-    # Use joinedload to ensure the `dimension` relation is loaded,
-    # so the @property access for dimension_name_de works during Pydantic serialization.
-    questions = db.query(Question)\
-                  .options(joinedload(Question.dimension), joinedload(Question.answers))\
-                  .order_by(Question.question_id)\
-                  .all()
-    
-    return {"questions": questions}
+    return _questionnaire_response(request, await reference_data_cache.aget(db))
+
+router.add_api_route(
+    "/",
+    get_questionnaire_async if get_settings().DB_ASYNC_ENDPOINTS else get_questionnaire,
+    methods=["GET"],
+    response_model=schemas.Questionnaire
+)
@@ -1,18 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-from database import get_db
+from database import get_db, get_async_db
 from models import Response, ResponseItem, Company
 from schemas import response as schemas
 from services.session_store import session_store
 from services.scoring_service import calculate_total_score
 from services.email_service import email_service
+from services.job_queue import job_queue
 from config import get_settings
-from sqlalchemy import func
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from typing import Optional
 import os
 
 router = APIRouter()
 
+VERIFICATION_EMAIL_JOB = "verification_email"
+
+def send_verification_email_job(payload: dict, db: Session):
+    """Background job: sends the double opt-in email queued by /complete."""
+    email_service.send_verification_email(
+        to_email=payload["to_email"],
+        company_name=payload["company_name"],
+        verification_link=payload["verification_link"],
+        lang=payload.get("lang", "en")
+    )
+
+job_queue.register(VERIFICATION_EMAIL_JOB, send_verification_email_job)
+
 @router.post("/", response_model=schemas.ResponseDetail)
 def create_response(response: schemas.ResponseCreate, db: Session = Depends(get_db)):
     """
@@ -26,22 +43,58 @@ def save_answer(response_id: int, item: schemas.ResponseUpdate, db: Session = De
     """
     Save or update an answer (Autosave).
     """
-    # Save to session store
-    session_store.save_answer(response_id, item.question_id, item.answer_ids)
-    
     # Return response details (mocked or retrieved from session)
     # Ideally should return the full response object, but ensuring schema match
     response_data = session_store.get_response(response_id)
     if not response_data:
          raise HTTPException(status_code=404, detail="Response not found")
-         
+
+    # Save to session store
+    session_store.save_answer(response_id, item.question_id, item.answer_ids)
     return response_data
 
+@router.patch("/{response_id}/items/batch", response_model=schemas.ResponseDetail)
+def save_answers(response_id: int, batch: schemas.ResponseBatchUpdate, db: Session = Depends(get_db)):
+    """
+    Save or update several answers at once (debounced autosave).
+    Items are applied in order; the last entry per question wins.
+    """
+    response_data = session_store.get_response(response_id)
+    if not response_data:
+         raise HTTPException(status_code=404, detail="Response not found")
+
+    session_store.save_answers(response_id, [(item.question_id, item.answer_ids) for item in batch.items])
+    return response_data
+
+def _completion_outcome(response_id: int, result_hash: str) -> dict:
+    return {"message": "Assessment completed and saved", "response_id": response_id, "result_hash": result_hash}
+
+def _replay_completion(response_id: int, idempotency_key: Optional[str], db: Session) -> Optional[dict]:
+    """
+    Returns the stored outcome if this response was already persisted (retried /complete), else None.
+    Only a retry carrying the Idempotency-Key that completed it gets the outcome back: the result_hash
+    grants access to the results, and response ids are sequential. Anything else is a conflict.
+    """
+    existing = db.query(Response.result_hash, Response.completion_key).filter(Response.response_id == response_id).first()
+    if not existing:
+        return None
+    if not idempotency_key or idempotency_key != existing.completion_key:
+        raise HTTPException(status_code=409, detail="This assessment has already been completed.")
+    return _completion_outcome(response_id, existing.result_hash)
+
 @router.post("/{response_id}/complete")
-def complete_assessment(response_id: int, completion_data: schemas.ResponseComplete, db: Session = Depends(get_db)):
+def complete_assessment(response_id: int, completion_data: schemas.ResponseComplete,
+                        idempotency_key: Optional[str] = Header(None, max_length=64), db: Session = Depends(get_db)):
     """
     Mark assessment as complete, update company details, persist data to DB, and trigger scoring/analysis.
+    Idempotent: a retry (same response_id, same Idempotency-Key) returns the stored outcome
+    without persisting or emailing again; without the original key it gets a 409.
     """
+    # 0. Replayed request? One indexed lookup instead of a full re-persist
+    replay = _replay_completion(response_id, idempotency_key, db)
+    if replay:
+        return replay
+
     # 0. Update Company Details in Session Store
     # We need to find the company_id associated with this response first
     # Or we can just get the session and update it
@@ -49,6 +102,10 @@ def complete_assessment(response_id: int, completion_data: schemas.ResponseCompl
     # 1. Retrieve full session data
     session_data = session_store.get_full_session(response_id)
     if not session_data:
+        # A concurrent duplicate may have completed (and released the session) in the meantime
+        replay = _replay_completion(response_id, idempotency_key, db)
+        if replay:
+            return replay
         raise HTTPException(status_code=404, detail="Response session not found")
         
     # Update Company in Session Store
@@ -94,62 +151,118 @@ def complete_assessment(response_id: int, completion_data: schemas.ResponseCompl
             created_at=response_data["created_at"],
             total_score=str(calculated_total_score), # Store the calculated value
             cluster_id=response_data["cluster_id"],
-            lang=completion_data.lang
+            lang=completion_data.lang,
+            completion_key=idempotency_key
         )
         db.merge(db_response)
         
         # 4. Persist Response Items
-        # Need to generate item_ids manually as they are not unique in session (0)
-        # Get current max item_id
-        max_item_id = db.query(func.max(ResponseItem.item_id)).scalar() or 0
-        
-        for item in items_data:
-            max_item_id += 1
-            db_item = ResponseItem(
-                item_id=max_item_id,
-                response_id=item["response_id"],
-                question_id=item["question_id"],
-                answers=item["answers"] # SQLAlchemy handles list -> ARRAY conversion
-            )
-            db.add(db_item)
+        # One multi-row INSERT; item_ids come from the response_items_item_id_seq sequence
+        db.flush() # company + response rows must exist for the FK
+        if items_data:
+            db.execute(insert(ResponseItem).values([
+                {
+                    "response_id": item["response_id"],
+                    "question_id": item["question_id"],
+                    "answers": item["answers"] # SQLAlchemy handles list -> ARRAY conversion
+                }
+                for item in items_data
+            ]))
+            
+        # 5. Verification Email via transactional outbox
+        # The job row commits atomically with the assessment; a background worker sends it via Brevo
+        frontend_url = get_settings().FRONTEND_URL
+        lang = completion_data.lang
+        verify_link = f"{frontend_url}/verify?token={response_data['result_hash']}&lang={lang}"
+        email_job = job_queue.stage(VERIFICATION_EMAIL_JOB, ref=response_data["result_hash"], payload={
+            "to_email": company_data["email"],
+            "company_name": company_data["company_name"],
+            "verification_link": verify_link,
+            "lang": lang
+        }, db=db)
             
         db.commit()
-        
-        # 5. Send Verification Email via Brevo
-        try:
-            # Determine base URL dynamically or from env
-            frontend_url = get_settings().FRONTEND_URL
-            lang = completion_data.lang
-            verify_link = f"{frontend_url}/verify?token={response_data['result_hash']}&lang={lang}"
-            email_service.send_verification_email(
-                to_email=company_data["email"],
-                company_name=company_data["company_name"],
-                verification_link=verify_link,
-                lang=completion_data.lang
-            )
-        except Exception as e:
-            print(f"CRITICAL: Failed to dispatch verification email to {company_data['email']}. Error: {e}")
-            raise HTTPException(
-                status_code=500,
-                detail="We encountered an issue sending your verification email. Please check your email address or try again later."
-            )
+        job_queue.submit(email_job.job_id)
         
     except HTTPException:
         # Re-raise HTTPExceptions directly to prevent them from being caught below 
         # and overwritten by generic "Failed to persist" responses.
         raise
+    except IntegrityError as e:
+        # A concurrent retry of the same completion committed first
+        db.rollback()
+        replay = _replay_completion(response_id, idempotency_key, db)
+        if replay:
+            return replay
+        print(f"Error persisting session data: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to persist assessment data: {str(e)}")
     except Exception as e:
         db.rollback()
         print(f"Error persisting session data: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to persist assessment data: {str(e)}")
 
-    return {"message": "Assessment completed and saved", "response_id": response_id, "result_hash": response_data["result_hash"]}
+    # The session is persisted now; free it from the session store
+    try:
+        session_store.release_session(response_id)
+    except Exception as e:
+        print(f"WARNING: Could not release session {response_id}: {e}")
+
+    # 6. Optionally precompute and persist the analysis so the first results view is a plain read
+    if get_settings().RESULTS_PRECOMPUTE_ON_COMPLETE:
+        from routers.results import precompute_results
+        precompute_results(response_data["result_hash"], completion_data.lang, db)
+
+    return _completion_outcome(response_id, response_data["result_hash"])
+
+RESULTS_EMAIL_JOB = "results_email"
+
+def send_results_email_job(payload: dict, db: Session):
+    """
+    Background job: renders the PDF report and emails it to the company.
+    Raises on failure so the job queue can retry.
+    """
+    token = payload["result_hash"]
+    response = db.query(Response).filter(Response.result_hash == token).first()
+    if not response:
+        raise ValueError(f"Response {token} not found")
+
+    company = db.query(Company).filter(Company.company_id == response.company_id).first()
+    if not company or not company.email:
+        return
+
+    frontend_url = get_settings().FRONTEND_URL
+    lang = payload.get("lang") or getattr(response, 'lang', 'en') or 'en'
+    lang_code = lang.split('-')[0].lower()
+    results_link = f"{frontend_url}/results/{token}?lang={lang_code}"
+
+    # Import pdf generation locally to avoid circular dependencies
+    from routers.results import get_results
+    from services.pdf_service import PDFService
+
+    # Computes (or reads back the precomputed) results and persists them in response_results
+    results_data = get_results(result_hash=token, lang=lang, db=db)
+    if hasattr(results_data, 'status_code'): # JSONResponse on error
+        raise RuntimeError(f"Results unavailable (HTTP {results_data.status_code})")
+
+    pdf_service = PDFService()
+    pdf_bytes = pdf_service.generate_pdf(results_data, lang=lang_code)
+
+    email_service.send_results_email_with_pdf(
+        to_email=company.email,
+        company_name=company.company_name,
+        results_link=results_link,
+        pdf_bytes=pdf_bytes,
+        lang=lang
+    )
+
+job_queue.register(RESULTS_EMAIL_JOB, send_results_email_job)
 
-@router.get("/verify")
 def verify_email(token: str, db: Session = Depends(get_db)):
     """
     Verify the user's email via the token (result_hash).
-    Once verified, sets is_verified=True and dispatches the PDF email.
+    Once verified, sets is_verified=True and queues the PDF email.
+    The verification flag and the PDF email job are committed in one transaction.
+    Delivery progress can be polled via /responses/{token}/report-status.
     """
     try:
         response = db.query(Response).filter(Response.result_hash == token).first()
@@ -161,46 +274,80 @@ def verify_email(token: str, db: Session = Depends(get_db)):
             
         # Update Verification Status
         response.is_verified = True
+        lang = getattr(response, 'lang', 'en') or 'en'
+        job = job_queue.stage(RESULTS_EMAIL_JOB, ref=token, payload={"result_hash": token, "lang": lang}, db=db)
         db.commit()
         
-        # Trigger Email with PDF in background (or synchronously for simplicity)
+        # Render + send the PDF in the background
         try:
-            company = db.query(Company).filter(Company.company_id == response.company_id).first()
-            if company and company.email:
-                frontend_url = get_settings().FRONTEND_URL
-                lang = getattr(response, 'lang', 'en') or 'en'
-                lang_code = lang.split('-')[0].lower()
-                results_link = f"{frontend_url}/results/{token}?lang={lang_code}"
-                
-                # Import pdf generation locally to avoid circular dependencies
-                from routers.results import get_results
-                from services.pdf_service import PDFService
-                
-                results_data = get_results(result_hash=token, lang=lang, db=db)
-                if not hasattr(results_data, 'status_code'): # Assumes success dict
-                    pdf_service = PDFService()
-                    pdf_bytes = pdf_service.generate_pdf(results_data, lang=lang_code)
-                    
-                    email_service.send_results_email_with_pdf(
-                        to_email=company.email,
-                        company_name=company.company_name,
-                        results_link=results_link,
-                        pdf_bytes=pdf_bytes,
-                        lang=lang
-                    )
+            job_queue.submit(job.job_id)
         except Exception as e:
-            import traceback
-            print(f"CRITICAL: Failed to generate/send PDF for {token}: {e}")
-            print(traceback.format_exc())
-            raise HTTPException(
-                status_code=500,
-                detail="Your email was verified, but we encountered an error dispatching your PDF report. You can still access your web dashboard."
-            )
+            # The job is persisted and picked up by the outbox drainer
+            print(f"CRITICAL: Failed to queue PDF email for {token}: {e}")
             
-        return {"message": "Email verified successfully.", "result_hash": token}
+        return {"message": "Email verified successfully.", "result_hash": token, "job_id": job.job_id}
         
     except HTTPException:
         raise
     except Exception as e:
+        db.rollback()
+        print(f"Error during verification: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error during verification")
+
+async def verify_email_async(token: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Async variant of verify_email (see DB_ASYNC_ENDPOINTS).
+    The verification flag and the PDF email job are committed in one transaction.
+    """
+    try:
+        response = (await db.execute(select(Response).where(Response.result_hash == token).limit(1))).scalar_one_or_none()
+        if not response:
+            raise HTTPException(status_code=404, detail="Invalid or expired verification token.")
+
+        if response.is_verified:
+            return {"message": "Already verified", "result_hash": token}
+
+        response.is_verified = True
+        lang = getattr(response, 'lang', 'en') or 'en'
+        job = job_queue.stage(RESULTS_EMAIL_JOB, ref=token, payload={"result_hash": token, "lang": lang}, db=db)
+        await db.commit()
+
+        # Render + send the PDF in the background
+        try:
+            job_queue.submit(job.job_id)
+        except Exception as e:
+            # The job is persisted and picked up by the outbox drainer
+            print(f"CRITICAL: Failed to queue PDF email for {token}: {e}")
+
+        return {"message": "Email verified successfully.", "result_hash": token, "job_id": job.job_id}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
         print(f"Error during verification: {e}")
         raise HTTPException(status_code=500, detail="Internal server error during verification")
+
+router.add_api_route(
+    "/verify",
+    verify_email_async if get_settings().DB_ASYNC_ENDPOINTS else verify_email,
+    methods=["GET"]
+)
+
+@router.get("/{result_hash}/report-status")
+def get_report_status(result_hash: str, db: Session = Depends(get_db)):
+    """
+    Status of the PDF report email queued at verification
+    (queued, running, retrying, succeeded, failed).
+    """
+    job = job_queue.get_latest(result_hash, RESULTS_EMAIL_JOB, db)
+    if not job:
+        raise HTTPException(status_code=404, detail="No report delivery found for this response.")
+
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "updated_at": job.updated_at
+    }
@@ -1,195 +1,291 @@
-import sys
-import os
-import pandas as pd
-import numpy as np
+from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from database import get_db
-from models import Response, ResponseItem, Company, Question, Answer, Dimension, ClusterProfile
-from sqlalchemy import func
-
-# Add project root to sys.path to allow importing from benchmarking_ai
-# PROD: backend/modules/benchmarking_ai -> Add ../modules to path
-# DEV: benchmarking_ai (sibling of backend) -> Add ../../../.. to path
-
-current_dir = os.path.dirname(os.path.abspath(__file__))
-prod_module_path = os.path.join(current_dir, "../modules")
-
-if os.path.exists(prod_module_path):
-    sys.path.append(prod_module_path)
-    print(f"Added PROD path to sys.path: {prod_module_path}")
-else:
-    # Fallback to Dev
-    dev_path = os.path.abspath(os.path.join(current_dir, "../../../../"))
-    sys.path.append(dev_path)
-    print(f"Added DEV path to sys.path: {dev_path}")
-
-try:
-    from benchmarking_ai.ml_v5.inference import InferenceEngine
-    # Initialize Engine Global (Lazy load or at startup)
-    # Note: This loads models into memory once
-    inference_engine = InferenceEngine()
-    print("ML Inference Engine Loaded Successfully")
-except ImportError as e:
-    print(f"Failed to import InferenceEngine: {e}")
-    inference_engine = None
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from database import get_db, get_async_db
+from config import get_settings
+from models import Response, ResponseItem, Company, ResultSnapshot
+from services.reference_data import reference_data_cache
+from services.results_cache import results_cache, to_jsonable
+from sqlalchemy import and_, select
+
+from services.model_loader import model_loader
 
 router = APIRouter()
 
-@router.get("/{result_hash}/results")
-def get_results(result_hash: str, lang: str = "en", db: Session = Depends(get_db)):
+ENGINE_UNAVAILABLE = "AI Analysis Engine is unavailable."
+
+def _require_engine():
+    """Waits (bounded by ML_LOAD_WAIT_SECONDS) for the background model load."""
+    engine = model_loader.wait(get_settings().ML_LOAD_WAIT_SECONDS)
+    if engine is None or not engine.loaded:
+         raise HTTPException(status_code=503, detail=ENGINE_UNAVAILABLE)
+    return engine
+
+async def _arequire_engine():
+    engine = await model_loader.await_engine(get_settings().ML_LOAD_WAIT_SECONDS)
+    if engine is None or not engine.loaded:
+         raise HTTPException(status_code=503, detail=ENGINE_UNAVAILABLE)
+    return engine
+
+def _fill(value, default):
+    """fillna() for a single metadata value."""
+    return default if value is None else value
+
+def _model_version(ref) -> str:
     """
-    Retrieve full analysis results.
-    1. Fetch Session Data
-    2. Score Dimensions (Replicating DataPipeline logic)
-    3. Run ML Inference
-    4. Return JSON
+    Version stamp of a results payload: ML artifacts + questionnaire reference data.
+    Available while the models are still loading, so cache lookups never wait for them.
+    """
+    version = model_loader.model_version()
+    if version is None:
+        raise HTTPException(status_code=503, detail=ENGINE_UNAVAILABLE)
+    return f"{version}-{ref.fingerprint}"
+
+def _compute_results(response: Response, lang_code: str, ref, db: Session) -> dict:
+    """
+    Scores a persisted response and runs the ML analysis on it.
+    Returns the JSON-safe results payload (raises HTTPException on failure).
     """
+    company = db.query(Company).filter(Company.company_id == response.company_id).first()
+
+    items = db.query(ResponseItem).filter(ResponseItem.response_id == response.response_id).all()
+    if not items:
+         raise HTTPException(status_code=400, detail="No answers found for this response")
+
+    # Skipped questions (empty answers) are kept and score 1.0
+    rows_items = [{"question_id": i.question_id, "answers": i.answers} for i in items]
+    return _analyze(company, rows_items, lang_code, ref)
+
+def _analyze(company: Company, rows_items: list, lang_code: str, ref) -> dict:
+    """
+    CPU part of the results: scoring kernel + ML inference (no DB access).
+    rows_items: list of {"question_id", "answers"} dicts.
+    """
+    # Imported on first use: keeps pandas off the startup path of every worker
+    import pandas as pd
+
+    # Scoring kernel (compiled once per reference data version)
+    engine = ref.scoring_engine()
+
+    # 2-3. Scoring Logic (vectorized kernel, see benchmarking_ai.ml_v5.scoring)
+    scores = engine.score(rows_items)
+
+    # Standardize Dimensions for Inference Engine (ML robustness)
+    # Ensure we have all 7 core dimensions, filling missing/skipped with 1.0
+    expected_dims = engine.feature_dimensions
+    print(f"DEBUG ML Input Features: {expected_dims}") # Log for debugging
+    
+    dim_results = pd.Series(scores["feature_scores"], index=pd.Index(expected_dims, name="dimension_name"))
+
+    # Per-question frame for gap analysis
+    # SANITIZATION: Fill missing metadata so downstream text rendering never sees None
+    q_index = scores["question_index"]
+    q_meta = [ref.questions_by_id[qid] for qid in scores["question_ids"].tolist()]
+    dim_names = [engine.dimension_names[d] for d in engine.question_dims[q_index].tolist()]
+    dim_names_de = [_fill((ref.dimensions_by_id.get(q["dimension_id"]) or {}).get("dimension_name_de"), "Unbekannte Dimension") for q in q_meta]
+
+    grouped_q = pd.DataFrame({
+        "question_id": scores["question_ids"],
+        "dimension_name": dim_names,
+        "dimension_name_de": dim_names_de,
+        "question_weight": engine.question_weights[q_index],
+        "question_type": [_fill(q["type"], "Slider") for q in q_meta],
+        "total_possible_weight": engine.total_weights[q_index],
+        "max_possible_weight": engine.max_weights[q_index],
+        "question_text": [_fill(q["question_text"], "Unknown Question") for q in q_meta],
+        "question_text_de": [_fill(q["question_text_de"], "Unbekannte Frage") for q in q_meta],
+        "tactical_theme": [_fill(q["header"], "General") for q in q_meta],
+        "tactical_theme_de": [_fill(q["header_de"], "Allgemein") for q in q_meta],
+        "sum_selected_weight": scores["sum_selected_weight"],
+        "question_score_contrib": scores["question_score_contrib"],
+        "score_1to5": scores["score_1to5"]
+    })
+
+    # Filter out General Psychology questions from the granular analysis dataframe
+    # This prevents metadata/demographic questions from appearing as "Strategic Gaps"
+    grouped_q = grouped_q[grouped_q['dimension_name'] != 'General Psychology']
+
+    # 5. Run Inference
+    analysis = model_loader.engine.run_analysis(dim_results, grouped_q, company_industry=company.industry, lang=lang_code)
+
+    if "error" in analysis:
+         raise HTTPException(status_code=500, detail=analysis["error"])
+
+    # 6. Construct Response
+    final_result = {
+        "company": {
+            "name": company.company_name,
+            "industry": company.industry,
+            "size": company.number_of_employees
+        },
+        "overall_score": round(dim_results.mean(), 2),
+        "dimension_scores": dim_results.round(2).to_dict(),
+        "cluster": analysis.get("cluster"),
+        "strategic_gaps": analysis.get("strategic_findings"),
+        "roadmap": analysis.get("roadmap"),
+        "executive_briefing": analysis.get("executive_briefing"),
+        "percentile": analysis.get("percentile"),
+        "benchmark_scores": analysis.get("benchmark_scores"),
+        "model_version": _model_version(ref)
+    }
+    return to_jsonable(final_result)
+
+def _store_results(response_id: int, lang_code: str, result: dict, db: Session):
+    """Upserts the precomputed payload. A failed write only costs a recompute later."""
     try:
-        lang_code = lang.split('-')[0].lower() if lang else 'en'
-        
-        if not inference_engine or not inference_engine.loaded:
-             raise HTTPException(status_code=503, detail="AI Analysis Engine is unavailable.")
-
-        # 1. Fetch Data
-        response = db.query(Response).filter(Response.result_hash == result_hash).first()
-        if not response:
-            raise HTTPException(status_code=404, detail="Response not found")
-            
-        if not response.is_verified:
-            raise HTTPException(status_code=403, detail="Email verification required to access results. Please check your inbox.")
-        
-        response_id = response.response_id
-        company = db.query(Company).filter(Company.company_id == response.company_id).first()
-        
-        items = db.query(ResponseItem).filter(ResponseItem.response_id == response_id).all()
+        db.merge(ResultSnapshot(
+            response_id=response_id,
+            lang=lang_code,
+            model_version=result["model_version"],
+            payload=result,
+            created_at=datetime.now(timezone.utc)
+        ))
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"WARNING: Could not persist results for response {response_id}: {e}")
+
+def load_results(result_hash: str, lang_code: str, db: Session, require_verified: bool = True) -> dict:
+    """
+    Returns the results payload for a response, computing it at most once per model version.
+    1. In-process memo (verified responses only)
+    2. Persisted payload in response_results (one indexed read together with the response)
+    3. Recompute (missing or stale model_version), then persist
+    Only step 3 needs the ML engine (and waits for its background load).
+    """
+    ref = reference_data_cache.get(db)
+    model_version = _model_version(ref)
+    cache_key = (result_hash, lang_code, model_version)
+
+    # 0. Memoized results (only verified responses are ever cached, and they are immutable)
+    cached = results_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # 1. Fetch response + stored payload in one round trip
+    row = (
+        db.query(Response, ResultSnapshot)
+        .outerjoin(ResultSnapshot, and_(ResultSnapshot.response_id == Response.response_id, ResultSnapshot.lang == lang_code))
+        .filter(Response.result_hash == result_hash)
+        .first()
+    )
+    if not row:
+        raise HTTPException(status_code=404, detail="Response not found")
+    response, stored = row
+
+    if require_verified and not response.is_verified:
+        raise HTTPException(status_code=403, detail="Email verification required to access results. Please check your inbox.")
+
+    if stored is not None and stored.model_version == model_version:
+        result = stored.payload
+    else:
+        # Missing, or computed with older models / reference data
+        _require_engine()
+        result = _compute_results(response, lang_code, ref, db)
+        _store_results(response.response_id, lang_code, result, db)
+
+    if response.is_verified:
+        results_cache.set(cache_key, result)
+    return result
+
+def precompute_results(result_hash: str, lang: str, db: Session):
+    """
+    Computes and persists the results payload ahead of the first read
+    (see RESULTS_PRECOMPUTE_ON_COMPLETE). Never raises: a failure only means the first read computes it.
+    """
+    lang_code = lang.split('-')[0].lower() if lang else 'en'
+    try:
+        load_results(result_hash, lang_code, db, require_verified=False)
+    except Exception as e:
+        print(f"WARNING: Precomputing results for {result_hash} failed: {e}")
+
+async def aload_results(result_hash: str, lang_code: str, db: AsyncSession) -> dict:
+    """
+    load_results() on the async engine. DB I/O is awaited; scoring + ML inference
+    run in the threadpool so they never block the event loop.
+    """
+    ref = await reference_data_cache.aget(db)
+    model_version = _model_version(ref)
+    cache_key = (result_hash, lang_code, model_version)
+
+    # 0. Memoized results (only verified responses are ever cached, and they are immutable)
+    cached = results_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # 1. Fetch response + stored payload in one round trip
+    row = (await db.execute(
+        select(Response, ResultSnapshot)
+        .outerjoin(ResultSnapshot, and_(ResultSnapshot.response_id == Response.response_id, ResultSnapshot.lang == lang_code))
+        .where(Response.result_hash == result_hash)
+        .limit(1)
+    )).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Response not found")
+    response, stored = row
+
+    if not response.is_verified:
+        raise HTTPException(status_code=403, detail="Email verification required to access results. Please check your inbox.")
+
+    # Plain values only from here on: a rollback expires ORM objects, and reloading them needs an await
+    response_id = response.response_id
+    if stored is not None and stored.model_version == model_version:
+        result = stored.payload
+    else:
+        await _arequire_engine()
+        company = await db.get(Company, response.company_id)
+        items = (await db.execute(
+            select(ResponseItem.question_id, ResponseItem.answers).where(ResponseItem.response_id == response_id)
+        )).all()
         if not items:
              raise HTTPException(status_code=400, detail="No answers found for this response")
 
-        # Fetch Reference Data
-        questions_all = db.query(Question).all()
-        dimensions_all = db.query(Dimension).all()
-        answers_all = db.query(Answer).all()
-
-        # 2. Convert to DataFrame
-        rows_items = [{"question_id": i.question_id, "answers": i.answers} for i in items]
-        df_items = pd.DataFrame(rows_items)
-        
-        # Include tactical_theme (header) and german variants
-        rows_questions = [{"question_id": q.question_id, "dimension_id": q.dimension_id, "question_weight": q.weight, "question_type": q.type, "question_text": q.question_text, "question_text_de": q.question_text_de, "tactical_theme": q.header, "tactical_theme_de": q.header_de} for q in questions_all]
-        df_questions = pd.DataFrame(rows_questions)
+        rows_items = [{"question_id": qid, "answers": answers} for qid, answers in items]
+        result = await run_in_threadpool(_analyze, company, rows_items, lang_code, ref)
 
-        rows_dims = [{"dimension_id": d.dimension_id, "dimension_name": d.dimension_name, "dimension_name_de": d.dimension_name_de} for d in dimensions_all]
-        df_dims = pd.DataFrame(rows_dims)
+        try:
+            await db.merge(ResultSnapshot(
+                response_id=response_id,
+                lang=lang_code,
+                model_version=result["model_version"],
+                payload=result,
+                created_at=datetime.now(timezone.utc)
+            ))
+            await db.commit()
+        except SQLAlchemyError as e:
+            await db.rollback()
+            print(f"WARNING: Could not persist results for response {response_id}: {e}")
 
-        rows_answers = [{"answer_id": a.answer_id, "question_id": a.question_id, "answer_weight": a.answer_weight} for a in answers_all]
-        df_answers_ref = pd.DataFrame(rows_answers)
+    results_cache.set(cache_key, result)
+    return result
 
-        # 3. Scoring Logic
-        # Preserve skipped questions (empty answers) by filling with [0] so explode doesn't drop them
-        df_items['answers'] = df_items['answers'].apply(lambda x: x if isinstance(x, list) and len(x) > 0 else [0])
-        
-        df_items_exploded = df_items.explode('answers')
-        df_items_exploded = df_items_exploded.rename(columns={'answers': 'answer_id'})
-        df_items_exploded['answer_id'] = df_items_exploded['answer_id'].astype(float).fillna(0).astype(int)
+async def get_results_async(result_hash: str, lang: str = "en", db: AsyncSession = Depends(get_async_db)):
+    """
+    Retrieve full analysis results (async variant of get_results, see DB_ASYNC_ENDPOINTS).
+    """
+    try:
+        lang_code = lang.split('-')[0].lower() if lang else 'en'
+        return await aload_results(result_hash, lang_code, db)
 
-        full_df = df_items_exploded.merge(df_answers_ref, on=['answer_id', 'question_id'], how='left')
-        full_df = full_df.merge(df_questions, on='question_id', how='left')
-        full_df = full_df.merge(df_dims, on='dimension_id', how='left')
-        
-        ans_stats = df_answers_ref.groupby('question_id').agg(
-            total_possible_weight=('answer_weight', 'sum'),
-            max_possible_weight=('answer_weight', 'max')
-        ).reset_index()
-        
-        full_df = full_df.merge(ans_stats, on='question_id', how='left')
-
-        # FIX: Added tactical_theme to groupby key to preserve it
-        # SANITIZATION: Fill missing metadata BEFORE groupby to prevent rows from being dropped due to NaNs
-        full_df.fillna({
-            'dimension_name': 'Unknown Dimension',
-            'dimension_name_de': 'Unbekannte Dimension',
-            'question_text': 'Unknown Question',
-            'question_text_de': 'Unbekannte Frage',
-            'tactical_theme': 'General',
-            'tactical_theme_de': 'Allgemein',
-            'question_type': 'Slider',
-            'question_weight': 1.0
-        }, inplace=True)
-
-        grouped_q = full_df.groupby([
-            'question_id', 'dimension_name', 'dimension_name_de', 'question_weight', 'question_type', 
-            'total_possible_weight', 'max_possible_weight', 'question_text', 'question_text_de', 'tactical_theme', 'tactical_theme_de'
-        ])['answer_weight'].sum().reset_index().rename(columns={'answer_weight': 'sum_selected_weight'})
-
-        def calculate_question_score(row):
-            if row['question_type'] == 'Checklist':
-                total_w = row['total_possible_weight']
-                ratio = row['sum_selected_weight'] / total_w if total_w > 0 else 0
-            else:
-                max_w = row['max_possible_weight']
-                ratio = row['sum_selected_weight'] / max_w if max_w > 0 else 0
-            
-            # Clamp ratio to 1.0 to prevent scoring overflow (Logic Fix)
-            ratio = min(1.0, ratio)
-            
-            return (ratio * row['question_weight']) / 100
-
-        grouped_q['question_score_contrib'] = grouped_q.apply(calculate_question_score, axis=1)
-
-        dim_groups = grouped_q.groupby('dimension_name')
-        dim_results = dim_groups.apply(
-            lambda x: (x['question_score_contrib'].sum() / (x['question_weight'].sum() / 100)) * 4 + 1 
-            if x['question_weight'].sum() > 0 else 1.0
-        )
-        
-        # Standardize Dimensions for Inference Engine (ML robustness)
-        # Ensure we have all 7 core dimensions, filling missing/skipped with 1.0
-        all_dims = df_dims['dimension_name'].unique().tolist()
-        expected_dims = sorted([d for d in all_dims if d != 'General Psychology'])
-        print(f"DEBUG ML Input Features: {expected_dims}") # Log for debugging
-        
-        dim_results = dim_results.reindex(expected_dims, fill_value=1.0)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        print(f"CRITICAL ERROR in get_results: {e}")
+        from fastapi.responses import JSONResponse
+        return JSONResponse(status_code=500, content={"detail": f"Debug Error: {str(e)}"})
 
-        # Recalculate per-question score for gap analysis
-        grouped_q['score_1to5'] = (grouped_q['question_score_contrib'] / (grouped_q['question_weight'] / 100)) * 4 + 1
-        grouped_q['score_1to5'] = grouped_q['score_1to5'].fillna(1.0)
-        
-        # SANITIZATION
-        grouped_q['tactical_theme'] = grouped_q['tactical_theme'].fillna("")
-        grouped_q['tactical_theme_de'] = grouped_q['tactical_theme_de'].fillna("")
-        grouped_q['question_text'] = grouped_q['question_text'].fillna("")
-        grouped_q['question_text_de'] = grouped_q['question_text_de'].fillna("")
-        grouped_q['question_type'] = grouped_q['question_type'].fillna("")
-
-        # Filter out General Psychology questions from the granular analysis dataframe
-        # This prevents metadata/demographic questions from appearing as "Strategic Gaps"
-        grouped_q = grouped_q[grouped_q['dimension_name'] != 'General Psychology']
-
-        # 5. Run Inference
-        analysis = inference_engine.run_analysis(dim_results, grouped_q, company_industry=company.industry, lang=lang_code)
-
-        if "error" in analysis:
-             raise HTTPException(status_code=500, detail=analysis["error"])
-
-        # 6. Construct Response
-        final_result = {
-            "company": {
-                "name": company.company_name,
-                "industry": company.industry,
-                "size": company.number_of_employees
-            },
-            "overall_score": round(dim_results.mean(), 2),
-            "dimension_scores": dim_results.round(2).to_dict(),
-            "cluster": analysis.get("cluster"),
-            "strategic_gaps": analysis.get("strategic_findings"),
-            "roadmap": analysis.get("roadmap"),
-            "executive_briefing": analysis.get("executive_briefing"),
-            "percentile": analysis.get("percentile"),
-            "benchmark_scores": analysis.get("benchmark_scores")
-        }
-        
-        return final_result
+def get_results(result_hash: str, lang: str = "en", db: Session = Depends(get_db)):
+    """
+    Retrieve full analysis results.
+    Served from the persisted response_results payload; scoring + ML inference
+    only run when it is missing or was computed with a different model version.
+    """
+    try:
+        lang_code = lang.split('-')[0].lower() if lang else 'en'
+        return load_results(result_hash, lang_code, db)
 
     except Exception as e:
         import traceback
@@ -198,8 +294,13 @@ def get_results(result_hash: str, lang: str = "en", db: Session = Depends(get_db
         from fastapi.responses import JSONResponse
         return JSONResponse(status_code=500, content={"detail": f"Debug Error: {str(e)}"})
 
+router.add_api_route(
+    "/{result_hash}/results",
+    get_results_async if get_settings().DB_ASYNC_ENDPOINTS else get_results,
+    methods=["GET"]
+)
+
 from fastapi import Response as FastAPIResponse
-from services.pdf_service import PDFService
 
 @router.get("/{result_hash}/pdf")
 def generate_pdf(result_hash: str, lang: str = "en", db: Session = Depends(get_db)):
@@ -216,7 +317,8 @@ def generate_pdf(result_hash: str, lang: str = "en", db: Session = Depends(get_d
         if hasattr(results_data, 'status_code') and results_data.status_code >= 400:
              raise HTTPException(status_code=results_data.status_code, detail="Could not fetch results data")
 
-        # Generate PDF
+        # Generate PDF (ReportLab is imported on first use, not at startup)
+        from services.pdf_service import PDFService
         lang_code = lang.split('-')[0].lower()
         pdf_service = PDFService()
         pdf_bytes = pdf_service.generate_pdf(results_data, lang=lang_code)
@@ -15,6 +15,9 @@ class ResponseUpdate(BaseModel):
     question_id: int
     answer_ids: List[int]
 
+class ResponseBatchUpdate(BaseModel):
+    items: List[ResponseUpdate] # Applied in order; the last entry per question_id wins
+
 class ResponseComplete(BaseModel):
     company_details: CompanyCreate
     lang: str = 'en'
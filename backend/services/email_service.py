@@ -1,7 +1,7 @@
 import os
 import json
 import logging
-import urllib.request
+import threading
 from typing import Optional
 
 logger = logging.getLogger(__name__)
@@ -9,6 +9,30 @@ logger = logging.getLogger(__name__)
 SENDER_EMAIL = "info@the-ai-compass.de"
 SENDER_NAME = "AI Compass"
 
+BREVO_HOST = "api.brevo.com"
+BREVO_SEND_PATH = "/v3/smtp/email"
+
+_brevo_pool = None
+_brevo_pool_lock = threading.Lock()
+
+def _get_brevo_pool():
+    """Shared keep-alive connection pool to the Brevo API (created on first send)."""
+    global _brevo_pool
+    if _brevo_pool is None:
+        with _brevo_pool_lock:
+            if _brevo_pool is None:
+                from config import get_settings
+                from services.http_pool import KeepAliveHTTPSPool
+                settings = get_settings()
+                _brevo_pool = KeepAliveHTTPSPool(
+                    BREVO_HOST,
+                    max_connections=settings.EMAIL_HTTP_MAX_CONNECTIONS,
+                    connect_timeout=settings.EMAIL_HTTP_CONNECT_TIMEOUT,
+                    read_timeout=settings.EMAIL_HTTP_READ_TIMEOUT,
+                    idle_seconds=settings.EMAIL_HTTP_IDLE_SECONDS
+                )
+    return _brevo_pool
+
 # Brand colors matching the webapp
 _GRADIENT_FROM = "#2563eb"   # blue-600  (same as nav CTA gradient start)
 _GRADIENT_TO   = "#9333ea"   # purple-600 (same as nav CTA gradient end)
@@ -149,29 +173,26 @@ class EmailService:
             logger.error("BREVO_API_KEY environment variable is not set. Cannot dispatch emails.")
             raise ValueError("Email Service Configuration Error: API Key missing.")
             
-        url = "https://api.brevo.com/v3/smtp/email"
         headers = {
             "accept": "application/json",
             "api-key": brevo_api_key,
             "content-type": "application/json"
         }
         
-        req = urllib.request.Request(url, data=json.dumps(data).encode('utf-8'), headers=headers, method='POST')
         try:
-            with urllib.request.urlopen(req) as response:
-                if response.status in (200, 201, 202):
-                    return True
-                else:
-                    logger.error(f"Brevo API failed with status {response.status}")
-                    raise RuntimeError(f"Email Dispatch Failed (Status {response.status})")
-        except urllib.error.HTTPError as e:
-            error_body = e.read().decode('utf-8', errors='ignore')
-            logger.error(f"Brevo HTTP Error: {e.code} - {error_body}")
-            raise RuntimeError("Upstream Email Provider Error") from e
+            status, body = _get_brevo_pool().request("POST", BREVO_SEND_PATH, body=json.dumps(data).encode('utf-8'), headers=headers)
         except Exception as e:
             logger.error(f"Fatal exception calling Brevo: {e}")
             raise RuntimeError("Email Service Unavailable") from e
 
+        if status in (200, 201, 202):
+            return True
+        if status >= 400:
+            logger.error(f"Brevo HTTP Error: {status} - {body.decode('utf-8', errors='ignore')}")
+            raise RuntimeError("Upstream Email Provider Error")
+        logger.error(f"Brevo API failed with status {status}")
+        raise RuntimeError(f"Email Dispatch Failed (Status {status})")
+
     @staticmethod
     def send_verification_email(to_email: str, company_name: str, verification_link: str, lang: str = 'en') -> bool:
         t = {
@@ -0,0 +1,127 @@
+import http.client
+import logging
+import ssl
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Safe to resend when the server dropped a reused connection without answering (RFC 9110, 9.2.2)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "TRACE", "PUT", "DELETE"})
+
+
+class KeepAliveHTTPSPool:
+    """
+    Small keep-alive HTTPS connection pool for a single host (stdlib only).
+
+    - At most max_connections requests are in flight; further callers wait up to
+      acquire_timeout for a free slot.
+    - Idle connections are reused (LIFO) so bursts skip the TCP + TLS handshake;
+      connections idle longer than idle_seconds are dropped instead of reused.
+    - connect_timeout bounds the TCP/TLS setup, read_timeout every socket read afterwards.
+    - A request that fails because the server dropped a reused idle connection is retried
+      once on a fresh one, only for idempotent methods unless the caller passes retry=True.
+    """
+
+    def __init__(self, host: str, max_connections: int = 4, connect_timeout: float = 5.0,
+                 read_timeout: float = 20.0, idle_seconds: float = 30.0, acquire_timeout: Optional[float] = None):
+        self.host = host
+        self.max_connections = max_connections
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.idle_seconds = idle_seconds
+        self.acquire_timeout = connect_timeout + read_timeout if acquire_timeout is None else acquire_timeout
+
+        self._ssl_context = ssl.create_default_context()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._idle: List[Tuple[http.client.HTTPSConnection, float]] = []
+        self._lock = threading.Lock()
+        # Counters, updated under self._lock (the pool is shared by all job workers)
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.requests_sent = 0
+        self.retries = 0
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None, retry: Optional[bool] = None) -> Tuple[int, bytes]:
+        """
+        Sends a request and returns (status, response body).
+        retry: resend once after a dropped keep-alive connection (default: only idempotent methods).
+        """
+        if retry is None:
+            retry = method.upper() in IDEMPOTENT_METHODS
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError(f"No free connection to {self.host} within {self.acquire_timeout}s")
+        try:
+            conn, reused = self._checkout()
+            try:
+                status, data = self._send(conn, method, path, body, headers)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if not (reused and retry):
+                    raise
+                # The server closed the idle keep-alive connection: retry once on a fresh one
+                self._count("retries")
+                conn = self._connect()
+                try:
+                    status, data = self._send(conn, method, path, body, headers)
+                except Exception:
+                    conn.close()
+                    raise
+            except Exception:
+                conn.close()
+                raise
+            self._checkin(conn)
+            return status, data
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"idle": len(self._idle), "opened": self.connections_opened, "reused": self.connections_reused,
+                    "requests": self.requests_sent, "retries": self.retries, "max_connections": self.max_connections}
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _connect(self) -> http.client.HTTPSConnection:
+        conn = http.client.HTTPSConnection(self.host, timeout=self.connect_timeout, context=self._ssl_context)
+        conn.connect()
+        conn.sock.settimeout(self.read_timeout)
+        self._count("connections_opened")
+        return conn
+
+    def _checkout(self) -> Tuple[http.client.HTTPSConnection, bool]:
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                conn, released_at = self._idle.pop()
+                if now - released_at < self.idle_seconds:
+                    self.connections_reused += 1
+                    return conn, True
+                conn.close()
+        return self._connect(), False
+
+    def _checkin(self, conn: http.client.HTTPSConnection):
+        if conn.sock is None:
+            # Server sent "Connection: close"
+            return
+        with self._lock:
+            self._idle.append((conn, time.monotonic()))
+
+    def _send(self, conn, method, path, body, headers) -> Tuple[int, bytes]:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        data = response.read()
+        self._count("requests_sent")
+        if response.will_close:
+            conn.close()
+        return response.status, data
@@ -0,0 +1,262 @@
+import logging
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import Job
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+RETRYING = "retrying"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _claimable(now: datetime):
+    """Queued jobs, and retrying / running jobs whose lease (backoff or run) has expired."""
+    lease_expired = or_(Job.lease_expires_at.is_(None), Job.lease_expires_at <= now)
+    return or_(Job.status == QUEUED, and_(Job.status.in_((RETRYING, RUNNING)), lease_expired))
+
+
+class JobQueue:
+    """
+    In-process background job queue with persisted state (jobs table).
+
+    - A bounded pool of daemon worker threads consumes job ids from a bounded queue.
+    - A worker claims a job with one conditional UPDATE, so when several workers or
+      app instances are handed the same job id exactly one of them runs it.
+    - A claim is a lease (lease_seconds): a running job whose lease expired is presumed
+      dead (crashed process) and can be claimed again.
+    - A drainer thread polls the jobs table (transactional outbox) every poll_interval_seconds
+      and submits claimable jobs, so a job is delivered even if submit() never ran
+      (crash between commit and submit) or the in-memory queue was full.
+    - Every state change is committed, so the status can be polled.
+    - Failed jobs are retried with exponential backoff up to max_attempts.
+
+    Handlers are registered per kind and called as handler(payload, db) with their own session.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_queue_size: Optional[int] = None,
+                 max_attempts: Optional[int] = None, retry_backoff_seconds: Optional[float] = None,
+                 lease_seconds: Optional[float] = None, poll_interval_seconds: Optional[float] = None,
+                 session_factory=SessionLocal):
+        settings = get_settings()
+        self.workers = settings.JOB_WORKERS if workers is None else workers
+        self.max_attempts = settings.JOB_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.retry_backoff_seconds = settings.JOB_RETRY_BACKOFF_SECONDS if retry_backoff_seconds is None else retry_backoff_seconds
+        self.lease_seconds = settings.JOB_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        self.poll_interval_seconds = settings.JOB_POLL_INTERVAL_SECONDS if poll_interval_seconds is None else poll_interval_seconds
+        self.session_factory = session_factory
+
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=settings.JOB_QUEUE_MAX_SIZE if max_queue_size is None else max_queue_size)
+        self._handlers: Dict[str, Callable[[dict, Session], None]] = {}
+        self._threads = []
+        self._started = False
+        self._local_ids = set() # Job ids in self._queue or being run by a worker of this process
+        self._lock = threading.Lock()
+
+    def register(self, kind: str, handler: Callable[[dict, Session], None]):
+        self._handlers[kind] = handler
+
+    def start(self):
+        """Starts the worker threads and the outbox drainer (idempotent)."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+            if self.poll_interval_seconds > 0:
+                threading.Thread(target=self._drainer, name="job-outbox-drainer", daemon=True).start()
+            logger.info(f"Job queue started with {self.workers} workers")
+
+    def stage(self, kind: str, ref: str, payload: dict, db: Session) -> Job:
+        """
+        Adds a job to the caller's transaction without committing (transactional outbox).
+        Call submit(job.job_id) once the transaction has committed.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+
+        now = _now()
+        job = Job(job_id=str(uuid.uuid4()), kind=kind, ref=ref, payload=payload, status=QUEUED, attempts=0,
+                  max_attempts=self.max_attempts, created_at=now, updated_at=now)
+        db.add(job)
+        return job
+
+    def submit(self, job_id: str):
+        """Hands a committed job to the worker pool."""
+        self.start()
+        self._submit(job_id)
+
+    def enqueue(self, kind: str, ref: str, payload: dict, db: Session) -> Job:
+        """Persists a new job and hands it to the worker pool."""
+        job = self.stage(kind, ref, payload, db)
+        db.commit()
+        self.submit(job.job_id)
+        return job
+
+    def get_latest(self, ref: str, kind: str, db: Session) -> Optional[Job]:
+        return (
+            db.query(Job)
+            .filter(Job.ref == ref, Job.kind == kind)
+            .order_by(Job.created_at.desc())
+            .first()
+        )
+
+    def drain(self) -> int:
+        """
+        Submits claimable jobs from the jobs table (oldest first, as many as the queue has room for).
+        Jobs running, or waiting for a retry, under another process' unexpired lease are left alone.
+        Returns the number of jobs submitted.
+        """
+        with self._lock:
+            room = self._queue.maxsize - self._queue.qsize() if self._queue.maxsize > 0 else None
+            local_ids = set(self._local_ids)
+        if room is not None and room <= 0:
+            return 0
+
+        db = self.session_factory()
+        try:
+            query = db.query(Job.job_id).filter(_claimable(_now()))
+            if local_ids:
+                query = query.filter(Job.job_id.notin_(local_ids))
+            query = query.order_by(Job.created_at)
+            if room is not None:
+                query = query.limit(room)
+            job_ids = [j.job_id for j in query.all()]
+        finally:
+            db.close()
+        return sum(1 for job_id in job_ids if self._submit(job_id))
+
+    def resume_pending(self):
+        """Submits jobs left unfinished by a previous process and starts the workers (call once at startup)."""
+        resumed = self.drain()
+        if resumed:
+            logger.info(f"Resuming {resumed} unfinished jobs")
+        self.start()
+
+    def stats(self) -> dict:
+        return {"workers": len(self._threads), "queued": self._queue.qsize(), "max_queue_size": self._queue.maxsize,
+                "poll_interval_seconds": self.poll_interval_seconds}
+
+    def _submit(self, job_id: str) -> bool:
+        with self._lock:
+            if job_id in self._local_ids:
+                return False
+            try:
+                self._queue.put_nowait(job_id)
+            except queue.Full:
+                # The job stays persisted as queued; the outbox drainer submits it once there is room
+                logger.warning(f"Job queue full, job {job_id} left to the outbox drainer")
+                return False
+            self._local_ids.add(job_id)
+            return True
+
+    def _drainer(self):
+        while True:
+            time.sleep(self.poll_interval_seconds)
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("Job outbox drain failed")
+
+    def _schedule_retry(self, job_id: str, delay: float):
+        timer = threading.Timer(delay, self._submit, args=(job_id,))
+        timer.daemon = True
+        timer.start()
+
+    def _worker(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            except Exception:
+                logger.exception(f"Job {job_id} crashed the worker loop")
+            finally:
+                with self._lock:
+                    self._local_ids.discard(job_id)
+                self._queue.task_done()
+
+    def _claim(self, job_id: str, db: Session) -> Optional[Job]:
+        """
+        Moves a claimable job to RUNNING under a new lease in one conditional UPDATE.
+        Returns the job, or None if it is finished or another worker holds it.
+        """
+        now = _now()
+        claimed = db.execute(
+            update(Job)
+            .where(Job.job_id == job_id, _claimable(now))
+            .values(status=RUNNING, attempts=func.coalesce(Job.attempts, 0) + 1, claimed_at=now,
+                    lease_expires_at=now + timedelta(seconds=self.lease_seconds), updated_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if claimed != 1:
+            return None
+        return db.query(Job).filter(Job.job_id == job_id).first()
+
+    def _finish(self, job: Job, db: Session, **values) -> bool:
+        """Records the outcome of a claim, unless the lease was lost to another worker meanwhile."""
+        values["updated_at"] = _now()
+        updated = db.execute(
+            update(Job)
+            .where(Job.job_id == job.job_id, Job.status == RUNNING, Job.attempts == job.attempts)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if updated != 1:
+            logger.warning(f"Job {job.job_id} ({job.kind}) lease lost, outcome of attempt {job.attempts} discarded")
+        return updated == 1
+
+    def _run(self, job_id: str):
+        db = self.session_factory()
+        try:
+            job = self._claim(job_id, db)
+            if job is None:
+                return
+            job_id, kind, attempts = job.job_id, job.kind, job.attempts
+            max_attempts = job.max_attempts or self.max_attempts
+
+            if attempts > max_attempts:
+                # Reclaimed after its worker died mid-run on the last attempt
+                self._finish(job, db, status=FAILED, last_error="Lease expired (worker lost)", lease_expires_at=None)
+                logger.error(f"Job {job_id} ({kind}) failed: lease expired on the last attempt")
+                return
+
+            try:
+                self._handlers[kind](job.payload or {}, db)
+            except Exception as e:
+                db.rollback()
+                if attempts < max_attempts:
+                    delay = self.retry_backoff_seconds * (2 ** (attempts - 1))
+                    # The lease now covers the backoff: only this process' timer resumes the job before it ends
+                    if self._finish(job, db, status=RETRYING, last_error=str(e)[:2000],
+                                    lease_expires_at=_now() + timedelta(seconds=delay)):
+                        logger.warning(f"Job {job_id} ({kind}) attempt {attempts} failed, retrying in {delay:g}s: {e}")
+                        self._schedule_retry(job_id, delay)
+                elif self._finish(job, db, status=FAILED, last_error=str(e)[:2000], lease_expires_at=None):
+                    logger.error(f"Job {job_id} ({kind}) failed after {attempts} attempts: {e}")
+                return
+
+            self._finish(job, db, status=SUCCEEDED, last_error=None, lease_expires_at=None)
+        finally:
+            db.close()
+
+
+job_queue = JobQueue()
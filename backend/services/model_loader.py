@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Optional
+
+import ml_path  # noqa: F401 - makes benchmarking_ai importable
+
+logger = logging.getLogger(__name__)
+
+NOT_STARTED = "not_started"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class ModelLoader:
+    """
+    Loads the ML InferenceEngine in a background thread, so importing the app
+    (and every worker boot) does not wait for sklearn/pandas and the unpickled artifacts.
+
+    start() is called at app startup; wait()/await_engine() start the load on demand
+    as well and block for at most a bounded time. The engine is loaded once per process.
+    """
+
+    def __init__(self):
+        self.engine = None
+        self.state = NOT_STARTED
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._future: Future = Future()
+        self._lock = threading.Lock()
+        self._artifacts_version: Optional[str] = None
+
+    def start(self):
+        with self._lock:
+            if self.state != NOT_STARTED:
+                return
+            self.state = LOADING
+        threading.Thread(target=self._load, name="ml-model-loader", daemon=True).start()
+
+    def _load(self):
+        started = time.monotonic()
+        try:
+            from benchmarking_ai.ml_v5.inference import InferenceEngine
+            # Loads models into memory once
+            engine = InferenceEngine()
+        except Exception as e:
+            self.error = str(e)
+            self.state = FAILED
+            logger.error(f"Failed to load ML Inference Engine: {e}")
+            self._future.set_result(None)
+            return
+
+        self.load_seconds = round(time.monotonic() - started, 3)
+        self.engine = engine
+        if engine.loaded:
+            self.state = READY
+            logger.info(f"ML Inference Engine loaded in {self.load_seconds}s (models {engine.model_version})")
+        else:
+            self.state = FAILED
+            self.error = "Model artifacts could not be loaded"
+            logger.error("ML Inference Engine started without models")
+        self._future.set_result(engine)
+
+    def wait(self, timeout: float):
+        """Returns the engine (None if loading failed) or None if it is not loaded within timeout seconds."""
+        self.start()
+        try:
+            return self._future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return None
+
+    async def await_engine(self, timeout: float):
+        """wait() for async endpoints: suspends the request instead of blocking the event loop."""
+        self.start()
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(self._future)), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def model_version(self) -> Optional[str]:
+        """
+        Version of the models being served, known before they finish loading (read from
+        the artifact files), so cached results can be served during the load. None if unreadable.
+        """
+        if self.engine is not None and self.engine.loaded:
+            return self.engine.model_version
+        if self._artifacts_version is None:
+            try:
+                from benchmarking_ai.ml_v5.artifacts import artifacts_version
+                self._artifacts_version = artifacts_version()
+            except Exception as e:
+                logger.error(f"Could not read the ML artifacts version: {e}")
+                return None
+        return self._artifacts_version
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "model_version": self.engine.model_version if self.engine is not None else None,
+            "load_seconds": self.load_seconds,
+            "error": self.error
+        }
+
+
+model_loader = ModelLoader()
@@ -0,0 +1,254 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import Text, cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import Session
+from models import Question, Answer, Dimension
+from config import get_settings
+import ml_path  # noqa: F401 - makes benchmarking_ai importable
+
+logger = logging.getLogger(__name__)
+
+_FRESH = "fresh"
+_PROBE = "probe"
+_RELOAD = "reload"
+
+# Every column of these feeds the snapshot, so the probe checksums whole rows
+_PROBED_TABLES = (Question.__table__, Answer.__table__, Dimension.__table__)
+
+
+class ReferenceData:
+    """
+    Immutable snapshot of the questionnaire reference tables
+    (questions, answers, dimensions) as plain dicts.
+    Treat it as read-only: it is shared by every request in the process.
+    """
+
+    def __init__(self, version: int, signature: Tuple, questions: List[dict], dimensions: List[dict], answers: List[dict]):
+        self.version = version
+        self.signature = signature
+        # Stable across processes (unlike version), usable in shared cache keys
+        self.fingerprint = hashlib.sha1(repr(signature).encode("utf-8")).hexdigest()[:8]
+        self.questions = questions
+        self.dimensions = dimensions
+        self.answers = answers
+
+        self.questions_by_id: Dict[int, dict] = {q["question_id"]: q for q in questions}
+        self.dimensions_by_id: Dict[int, dict] = {d["dimension_id"]: d for d in dimensions}
+        self.answers_by_question: Dict[int, List[dict]] = {}
+        for a in answers:
+            self.answers_by_question.setdefault(a["question_id"], []).append(a)
+
+        self._engine = None
+        self._engine_lock = threading.Lock()
+        self._derived: Dict[str, object] = {}
+
+    def scoring_engine(self):
+        """
+        Returns the ScoringEngine compiled from this snapshot.
+        Compiled once per snapshot version and shared by all requests.
+        """
+        if self._engine is None:
+            with self._engine_lock:
+                if self._engine is None:
+                    from benchmarking_ai.ml_v5.scoring import ScoringEngine
+                    self._engine = ScoringEngine(self.questions, self.answers, self.dimensions)
+        return self._engine
+
+    def derived(self, name: str, build: Callable[["ReferenceData"], object]):
+        """
+        Returns build(self), computed once per snapshot and cached under name
+        (e.g. serialized payloads). Dropped together with the snapshot on reload.
+        """
+        value = self._derived.get(name)
+        if value is None:
+            with self._engine_lock:
+                value = self._derived.get(name)
+                if value is None:
+                    value = build(self)
+                    self._derived[name] = value
+        return value
+
+
+class ReferenceDataCache:
+    """
+    Process-wide, versioned cache of the questionnaire reference data.
+
+    The snapshot is reloaded when:
+    - it is older than REFERENCE_DATA_TTL_SECONDS, or
+    - the version probe (a checksum over the full contents of each table) changes.
+      The probe runs at most once every REFERENCE_DATA_PROBE_SECONDS.
+    The app never writes these tables; the maintenance scripts that do
+    (e.g. sync_hardcoded_to_db.py) are picked up by the probe.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None, probe_interval_seconds: Optional[int] = None):
+        settings = get_settings()
+        self.ttl_seconds = settings.REFERENCE_DATA_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.probe_interval_seconds = settings.REFERENCE_DATA_PROBE_SECONDS if probe_interval_seconds is None else probe_interval_seconds
+
+        self._snapshot: Optional[ReferenceData] = None
+        self._loaded_at = 0.0
+        self._probed_at = 0.0
+        self._version = 0
+        self._lock = threading.Lock() # Serializes sync reloads (threadpool); held across their I/O
+        self._install_lock = threading.Lock() # Only guards swapping the snapshot in, never held across I/O
+        self._async_lock: Optional[asyncio.Lock] = None
+        self._async_lock_loop = None
+
+    def _needs(self, snapshot: Optional[ReferenceData], now: float) -> str:
+        """What get()/aget() has to do: serve the snapshot as is, probe the version first, or reload."""
+        if snapshot is None or now - self._loaded_at >= self.ttl_seconds:
+            return _RELOAD
+        if now - self._probed_at < self.probe_interval_seconds:
+            return _FRESH
+        return _PROBE
+
+    def get(self, db: Session) -> ReferenceData:
+        now = time.monotonic()
+        snapshot = self._snapshot
+
+        needs = self._needs(snapshot, now)
+        if needs == _FRESH:
+            return snapshot
+        if needs == _PROBE:
+            if self._probe(db) == snapshot.signature:
+                self._probed_at = now
+                return snapshot
+            logger.info("Reference data changed (probe mismatch), reloading")
+
+        with self._lock:
+            # Another thread may have reloaded while we waited
+            if self._snapshot is not None and self._snapshot is not snapshot:
+                return self._snapshot
+            return self._install(
+                self._probe(db),
+                *(db.execute(stmt).scalars().all() for stmt in self._load_statements())
+            )
+
+    async def aget(self, db) -> ReferenceData:
+        """
+        get() for an AsyncSession: the same queries, awaited on the async driver.
+        Concurrent reloads wait on an asyncio.Lock, so the event loop never blocks on a thread lock.
+        """
+        now = time.monotonic()
+        snapshot = self._snapshot
+
+        needs = self._needs(snapshot, now)
+        if needs == _FRESH:
+            return snapshot
+        if needs == _PROBE:
+            if await self._aprobe(db) == snapshot.signature:
+                self._probed_at = now
+                return snapshot
+            logger.info("Reference data changed (probe mismatch), reloading")
+
+        async with self._async_reload_lock():
+            if self._snapshot is not None and self._snapshot is not snapshot:
+                return self._snapshot
+            signature = await self._aprobe(db)
+            rows = [(await db.execute(stmt)).scalars().all() for stmt in self._load_statements()]
+            return self._install(signature, *rows)
+
+    def _async_reload_lock(self) -> asyncio.Lock:
+        # One lock per event loop (an asyncio.Lock must not be shared across loops)
+        loop = asyncio.get_running_loop()
+        if self._async_lock_loop is not loop:
+            self._async_lock, self._async_lock_loop = asyncio.Lock(), loop
+        return self._async_lock
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version if self._snapshot is not None else 0
+
+    @staticmethod
+    def _probe_statements(dialect: str) -> List:
+        """
+        On PostgreSQL a single statement returning the md5 of each table's rows, ordered by id
+        (one round trip). Elsewhere the ordered rows themselves, hashed by _signature().
+        """
+        if dialect == "postgresql":
+            return [select(*(
+                select(func.md5(func.string_agg(
+                    cast(func.json_build_array(*table.columns), Text),
+                    aggregate_order_by(literal_column("','"), *table.primary_key.columns)
+                ))).scalar_subquery()
+                for table in _PROBED_TABLES
+            ))]
+        return [select(*table.columns).order_by(*table.primary_key.columns) for table in _PROBED_TABLES]
+
+    @staticmethod
+    def _signature(dialect: str, results: List[List]) -> Tuple:
+        if dialect == "postgresql":
+            return tuple(results[0][0])
+        return tuple(hashlib.md5(repr([tuple(row) for row in rows]).encode("utf-8")).hexdigest() for rows in results)
+
+    def _probe(self, db: Session) -> Tuple:
+        dialect = db.get_bind().dialect.name
+        return self._signature(dialect, [db.execute(stmt).all() for stmt in self._probe_statements(dialect)])
+
+    async def _aprobe(self, db) -> Tuple:
+        dialect = db.bind.dialect.name
+        return self._signature(dialect, [(await db.execute(stmt)).all() for stmt in self._probe_statements(dialect)])
+
+    @staticmethod
+    def _load_statements():
+        """(questions, dimensions, answers), each ordered by id."""
+        return (
+            select(Question).order_by(Question.question_id),
+            select(Dimension).order_by(Dimension.dimension_id),
+            select(Answer).order_by(Answer.answer_id),
+        )
+
+    def _install(self, signature: Tuple, questions, dimensions, answers) -> ReferenceData:
+        """Builds the snapshot from the loaded rows and makes it current (no I/O)."""
+        dim_rows = [{
+            "dimension_id": d.dimension_id,
+            "dimension_name": d.dimension_name,
+            "dimension_name_de": d.dimension_name_de,
+            "dimension_weight": d.dimension_weight
+        } for d in dimensions]
+        dims_by_id = {d["dimension_id"]: d for d in dim_rows}
+
+        question_rows = []
+        for q in questions:
+            dim = dims_by_id.get(q.dimension_id)
+            question_rows.append({
+                "question_id": q.question_id,
+                "dimension_id": q.dimension_id,
+                "dimension_name": dim["dimension_name"] if dim else None,
+                "dimension_name_de": dim["dimension_name_de"] if dim else None,
+                "header": q.header,
+                "header_de": q.header_de,
+                "question_text": q.question_text,
+                "question_text_de": q.question_text_de,
+                "type": q.type,
+                "weight": q.weight,
+                "optional": q.optional
+            })
+
+        answer_rows = [{
+            "answer_id": a.answer_id,
+            "question_id": a.question_id,
+            "answer_text": a.answer_text,
+            "answer_text_de": a.answer_text_de,
+            "answer_level": a.answer_level,
+            "answer_weight": a.answer_weight
+        } for a in answers]
+
+        with self._install_lock:
+            self._version += 1
+            snapshot = ReferenceData(self._version, signature, question_rows, dim_rows, answer_rows)
+            now = time.monotonic()
+            self._snapshot = snapshot
+            self._loaded_at = now
+            self._probed_at = now
+        logger.info(f"Loaded reference data v{snapshot.version}: {len(question_rows)} questions, {len(answer_rows)} answers, {len(dim_rows)} dimensions")
+        return snapshot
+
+
+reference_data_cache = ReferenceDataCache()
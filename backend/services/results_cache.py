@@ -0,0 +1,150 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value):
+    # numpy scalars / arrays coming out of the inference engine
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def to_jsonable(result: dict) -> dict:
+    """Round-trips a results payload through JSON (numpy scalars -> Python types)."""
+    return json.loads(json.dumps(result, default=_json_default))
+
+
+class ResultsCacheBackend:
+    """
+    Storage interface for the results cache. Values are opaque bytes so the local
+    dict can be swapped for an external store (e.g. Redis/Memcached) without touching callers.
+    """
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class InMemoryLRUBackend(ResultsCacheBackend):
+    """Process-local LRU bounded by total payload bytes and entry count."""
+
+    def __init__(self, max_bytes: int, max_entries: int):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            # Never let a single payload flush the whole cache
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = value
+            self._bytes += len(value)
+            while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self._evictions
+            }
+
+
+class ResultsCache:
+    """
+    Memoizes get_results payloads keyed by (result_hash, lang, model_version).
+    A verified response is immutable, so an entry only goes stale when the models or
+    the reference data change - both are part of model_version.
+    """
+
+    def __init__(self, backend: Optional[ResultsCacheBackend] = None, enabled: Optional[bool] = None):
+        settings = get_settings()
+        self.enabled = settings.RESULTS_CACHE_ENABLED if enabled is None else enabled
+        self.backend = backend or InMemoryLRUBackend(
+            max_bytes=settings.RESULTS_CACHE_MAX_BYTES,
+            max_entries=settings.RESULTS_CACHE_MAX_ENTRIES
+        )
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(result_hash: str, lang: str, model_version: str) -> str:
+        return f"results:{model_version}:{lang}:{result_hash}"
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        payload = self.backend.get(self.make_key(*key))
+        if payload is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(payload)
+
+    def set(self, key: Tuple[str, str, str], result: dict):
+        if not self.enabled:
+            return
+        try:
+            payload = json.dumps(result, default=_json_default).encode("utf-8")
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Results for {key[0]} not cacheable: {e}")
+            return
+        self.backend.set(self.make_key(*key), payload)
+
+    def invalidate(self, key: Tuple[str, str, str]):
+        self.backend.delete(self.make_key(*key))
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, **self.backend.stats()}
+
+
+results_cache = ResultsCache()
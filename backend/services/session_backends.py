@@ -0,0 +1,578 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, BigInteger, Float, String, Text, create_engine, event, select, update, delete, func
+)
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+COMPANY = "company"
+RESPONSE = "response"
+
+
+def dumps_session_json(data) -> str:
+    """JSON for session dicts (created_at datetimes become ISO strings)."""
+    return json.dumps(data, default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v))
+
+
+class SessionBackend:
+    """
+    Storage interface for in-progress assessment sessions (companies, responses, answers).
+    SessionStore holds the business logic; a backend only stores dicts and allocates IDs.
+    """
+
+    def allocate_id(self, kind: str) -> int:
+        """Atomically returns the next ID for kind (COMPANY / RESPONSE)."""
+        raise NotImplementedError
+
+    def ensure_id_floor(self, kind: str, value: int):
+        """Makes sure allocate_id(kind) never returns an ID <= value."""
+        raise NotImplementedError
+
+    def get_company(self, company_id: int) -> Optional[dict]:
+        raise NotImplementedError
+
+    def put_company(self, company_id: int, company: dict):
+        raise NotImplementedError
+
+    def get_response(self, response_id: int) -> Optional[dict]:
+        raise NotImplementedError
+
+    def put_response(self, response_id: int, response: dict):
+        raise NotImplementedError
+
+    def put_item(self, response_id: int, item: dict):
+        """Stores the answer item for (response_id, item["question_id"]), replacing any previous one."""
+        raise NotImplementedError
+
+    def put_items(self, response_id: int, items: List[dict]):
+        """Stores several answer items of one response (one lock / transaction where possible)."""
+        for item in items:
+            self.put_item(response_id, item)
+
+    def get_items(self, response_id: int) -> List[dict]:
+        raise NotImplementedError
+
+    def delete_session(self, response_id: int):
+        """Drops a response, its answers and its company."""
+        raise NotImplementedError
+
+    def evict(self, idle_before: float, max_sessions: int) -> Tuple[int, int]:
+        """
+        Drops sessions (response + answers + company) last written before idle_before (epoch seconds),
+        then the least recently written ones beyond max_sessions, then idle companies without a response.
+
+        Returns:
+            (sessions evicted by TTL, sessions evicted by capacity)
+        """
+        raise NotImplementedError
+
+    def counts(self) -> Dict[str, int]:
+        """Resident companies / responses / answer items."""
+        raise NotImplementedError
+
+    def close(self):
+        """Flushes and releases resources at shutdown."""
+        pass
+
+
+class _Shard:
+    """One lock stripe: the sessions (or companies) whose id hashes to it, plus their last-write order."""
+
+    __slots__ = ("lock", "data", "values", "activity", "refs")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data: Dict[int, dict] = {}
+        self.values: Dict[int, Dict[int, dict]] = {} # response_id -> {question_id: answer item}
+        self.activity: "OrderedDict[int, float]" = OrderedDict() # Last write, oldest first
+        self.refs: Dict[int, int] = {} # company_id -> number of live responses of the company
+
+
+class InMemorySessionBackend(SessionBackend):
+    """
+    Process-local, thread-safe session storage. Only correct with a single worker process.
+
+    State is split into lock stripes by id (response_id / company_id % stripes), so concurrent
+    autosaves of unrelated sessions only contend when they share a stripe. ID counters have their
+    own lock. No operation ever holds two stripe locks at once.
+    The session cap is enforced per stripe (max_sessions / stripes each).
+    Companies are reference-counted by their live responses and dropped with the last one.
+
+    If a journal is attached (see services.session_wal), every mutation is handed to it as a
+    record before it is applied, inside the same lock, so the log order per session matches
+    the applied order. apply() replays such records.
+    """
+
+    def __init__(self, stripes: int = 64):
+        self.stripes = stripes
+        self._responses = [_Shard() for _ in range(stripes)]
+        self._companies = [_Shard() for _ in range(stripes)]
+        self._counters: Dict[str, int] = {COMPANY: 0, RESPONSE: 0}
+        self._counter_lock = threading.Lock()
+        self.journal = None # Optional SessionWAL (append(record) / close())
+
+    def _response_shard(self, response_id: int) -> _Shard:
+        return self._responses[response_id % self.stripes]
+
+    def _company_shard(self, company_id: int) -> _Shard:
+        return self._companies[company_id % self.stripes]
+
+    def _log(self, record: dict):
+        if self.journal is not None:
+            self.journal.append(record)
+
+    @staticmethod
+    def _touch(shard: _Shard, key: int, ts: float):
+        shard.activity[key] = ts
+        shard.activity.move_to_end(key)
+
+    def allocate_id(self, kind: str) -> int:
+        with self._counter_lock:
+            value = self._counters[kind] + 1
+            self._log({"op": "id", "kind": kind, "value": value})
+            self._counters[kind] = value
+            return value
+
+    def ensure_id_floor(self, kind: str, value: int):
+        with self._counter_lock:
+            self._counters[kind] = max(self._counters[kind], value)
+
+    def get_company(self, company_id: int) -> Optional[dict]:
+        shard = self._company_shard(company_id)
+        with shard.lock:
+            return shard.data.get(company_id)
+
+    def put_company(self, company_id: int, company: dict):
+        shard = self._company_shard(company_id)
+        with shard.lock:
+            ts = time.time()
+            self._log({"op": "company", "id": company_id, "ts": ts, "data": company})
+            shard.data[company_id] = company
+            self._touch(shard, company_id, ts)
+
+    def get_response(self, response_id: int) -> Optional[dict]:
+        shard = self._response_shard(response_id)
+        with shard.lock:
+            return shard.data.get(response_id)
+
+    def put_response(self, response_id: int, response: dict):
+        self._set_response(response_id, response, log=True)
+
+    def _set_response(self, response_id: int, response: dict, log: bool, ts: Optional[float] = None):
+        # Retain the company before the response exists, so a concurrent delete of a sibling response cannot drop it
+        self._retain_company(response.get("company_id"))
+        shard = self._response_shard(response_id)
+        with shard.lock:
+            ts = time.time() if ts is None else ts
+            if log:
+                self._log({"op": "response", "id": response_id, "ts": ts, "data": response})
+            previous = shard.data.get(response_id)
+            shard.data[response_id] = response
+            self._touch(shard, response_id, ts)
+        if previous is not None:
+            self._release_company(previous.get("company_id"))
+
+    def put_item(self, response_id: int, item: dict):
+        self.put_items(response_id, [item])
+
+    def put_items(self, response_id: int, items: List[dict]):
+        shard = self._response_shard(response_id)
+        with shard.lock:
+            ts = time.time()
+            self._log({"op": "items", "id": response_id, "ts": ts, "items": items})
+            # O(1) per item: replaces any existing answer for the question in place
+            values = shard.values.setdefault(response_id, {})
+            for item in items:
+                values[item["question_id"]] = item
+            self._touch(shard, response_id, ts)
+
+    def get_items(self, response_id: int) -> List[dict]:
+        shard = self._response_shard(response_id)
+        with shard.lock:
+            return list(shard.values.get(response_id, {}).values())
+
+    def _pop_session(self, shard: _Shard, response_id: int) -> Optional[dict]:
+        """Removes a session from its (locked) stripe and returns the response dict."""
+        if response_id in shard.activity or response_id in shard.values:
+            self._log({"op": "delete", "id": response_id})
+        shard.values.pop(response_id, None)
+        shard.activity.pop(response_id, None)
+        return shard.data.pop(response_id, None)
+
+    def _retain_company(self, company_id: Optional[int]):
+        if company_id is None:
+            return
+        shard = self._company_shard(company_id)
+        with shard.lock:
+            shard.refs[company_id] = shard.refs.get(company_id, 0) + 1
+
+    def _release_company(self, company_id: Optional[int]):
+        """Drops one response's reference; the company goes with its last response."""
+        if company_id is None:
+            return
+        shard = self._company_shard(company_id)
+        with shard.lock:
+            remaining = shard.refs.get(company_id, 0) - 1
+            if remaining > 0:
+                shard.refs[company_id] = remaining
+                return
+            shard.refs.pop(company_id, None)
+            if company_id in shard.data:
+                self._log({"op": "delete_company", "id": company_id})
+            shard.data.pop(company_id, None)
+            shard.activity.pop(company_id, None)
+
+    def delete_session(self, response_id: int):
+        shard = self._response_shard(response_id)
+        with shard.lock:
+            response = self._pop_session(shard, response_id)
+        if response is not None:
+            self._release_company(response.get("company_id"))
+
+    def evict(self, idle_before: float, max_sessions: int) -> Tuple[int, int]:
+        expired = over_capacity = 0
+        per_stripe = max(1, max_sessions // self.stripes)
+
+        for shard in self._responses:
+            dropped = []
+            with shard.lock:
+                while shard.activity:
+                    response_id, last_write = next(iter(shard.activity.items()))
+                    if last_write < idle_before:
+                        expired += 1
+                    elif len(shard.activity) > per_stripe:
+                        over_capacity += 1
+                    else:
+                        break
+                    dropped.append(self._pop_session(shard, response_id))
+                # Items saved for a response that does not exist (unknown or already released id)
+                for response_id in [k for k in shard.values if k not in shard.data]:
+                    self._pop_session(shard, response_id)
+            for response in dropped:
+                if response is not None:
+                    self._release_company(response.get("company_id"))
+
+        # Companies whose wizard never got to create a response
+        for shard in self._companies:
+            with shard.lock:
+                for company_id, last_write in list(shard.activity.items()):
+                    if last_write >= idle_before:
+                        break
+                    if not shard.refs.get(company_id):
+                        self._log({"op": "delete_company", "id": company_id})
+                        shard.data.pop(company_id, None)
+                        shard.activity.pop(company_id, None)
+        return expired, over_capacity
+
+    def counts(self) -> Dict[str, int]:
+        companies = responses = items = 0
+        for shard in self._companies:
+            with shard.lock:
+                companies += len(shard.data)
+        for shard in self._responses:
+            with shard.lock:
+                responses += len(shard.data)
+                items += sum(len(v) for v in shard.values.values())
+        return {"companies": companies, "responses": responses, "items": items}
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+
+    def apply(self, record: dict):
+        """Replays one journal record (no journaling). Records are idempotent upserts/deletes."""
+        op = record["op"]
+        if op == "id":
+            with self._counter_lock:
+                self._counters[record["kind"]] = max(self._counters[record["kind"]], record["value"])
+        elif op == "company":
+            shard = self._company_shard(record["id"])
+            with shard.lock:
+                shard.data[record["id"]] = record["data"]
+                self._touch(shard, record["id"], record["ts"])
+        elif op == "response":
+            response = dict(record["data"])
+            if isinstance(response.get("created_at"), str):
+                response["created_at"] = datetime.fromisoformat(response["created_at"])
+            self._set_response(record["id"], response, log=False, ts=record["ts"])
+        elif op == "items":
+            shard = self._response_shard(record["id"])
+            with shard.lock:
+                values = shard.values.setdefault(record["id"], {})
+                for item in record["items"]:
+                    values[item["question_id"]] = item
+                self._touch(shard, record["id"], record["ts"])
+        elif op == "delete":
+            shard = self._response_shard(record["id"])
+            with shard.lock:
+                shard.values.pop(record["id"], None)
+                shard.activity.pop(record["id"], None)
+                response = shard.data.pop(record["id"], None)
+            if response is not None:
+                self._release_company(response.get("company_id"))
+        elif op == "delete_company":
+            shard = self._company_shard(record["id"])
+            with shard.lock:
+                shard.data.pop(record["id"], None)
+                shard.activity.pop(record["id"], None)
+
+    def dump(self) -> Iterator[dict]:
+        """
+        Yields the current state as journal records (for snapshots).
+        Stripes are read one at a time, so the result is consistent per session, not globally.
+        """
+        with self._counter_lock:
+            counters = dict(self._counters)
+        for kind, value in counters.items():
+            yield {"op": "id", "kind": kind, "value": value}
+        for shard in self._companies:
+            with shard.lock:
+                records = [{"op": "company", "id": k, "ts": ts, "data": shard.data[k]} for k, ts in shard.activity.items()]
+            yield from records
+        for shard in self._responses:
+            with shard.lock:
+                records = []
+                for k, ts in shard.activity.items():
+                    if k in shard.data:
+                        records.append({"op": "response", "id": k, "ts": ts, "data": shard.data[k]})
+                    if k in shard.values:
+                        records.append({"op": "items", "id": k, "ts": ts, "items": list(shard.values[k].values())})
+            yield from records
+
+
+class SQLSessionBackend(SessionBackend):
+    """
+    Session state in a SQL database shared by all workers.
+
+    - SQLite file (e.g. sqlite:////var/run/ai-compass/sessions.db): all workers on one node.
+    - The main Postgres database (empty SESSION_STORE_URL): all workers on all nodes.
+
+    IDs come from a counters table incremented with a single UPDATE ... RETURNING,
+    so concurrent workers never hand out the same ID.
+    """
+
+    metadata = MetaData()
+    counters = Table(
+        "session_counters", metadata,
+        Column("name", String(32), primary_key=True),
+        Column("value", BigInteger, nullable=False)
+    )
+    companies = Table(
+        "session_companies", metadata,
+        Column("company_id", Integer, primary_key=True),
+        Column("data", Text, nullable=False),
+        Column("updated_at", Float, nullable=False, index=True) # Epoch seconds of the last write
+    )
+    responses = Table(
+        "session_responses", metadata,
+        Column("response_id", Integer, primary_key=True),
+        Column("company_id", Integer, index=True),
+        Column("data", Text, nullable=False),
+        Column("updated_at", Float, nullable=False, index=True)
+    )
+    items = Table(
+        "session_items", metadata,
+        Column("response_id", Integer, primary_key=True),
+        Column("question_id", Integer, primary_key=True),
+        Column("data", Text, nullable=False)
+    )
+
+    def __init__(self, url: str):
+        if url.startswith("sqlite"):
+            self.engine = create_engine(url, connect_args={"check_same_thread": False, "timeout": 30})
+            event.listen(self.engine, "connect", self._sqlite_pragmas)
+        else:
+            # Own pool (a request may hold a main-pool connection while it calls the store), same DB_* settings
+            from config import get_settings
+            from database import engine_kwargs
+            settings = get_settings()
+            self.engine = create_engine(url, **engine_kwargs(url, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW))
+        self.metadata.create_all(self.engine)
+
+        if self.engine.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        self._insert = insert
+
+        self._seeded = set()
+        self._seed_lock = threading.Lock()
+
+    @staticmethod
+    def _sqlite_pragmas(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    @staticmethod
+    def _dumps(data: dict) -> str:
+        return dumps_session_json(data)
+
+    def _upsert(self, table, keys: dict, data: dict, **columns):
+        stmt = self._insert(table).values(**keys, data=self._dumps(data), **columns)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={c: stmt.excluded[c] for c in ["data", *columns]}
+        )
+        with self.engine.begin() as conn:
+            conn.execute(stmt)
+
+    def _get(self, table, key_col, key) -> Optional[dict]:
+        with self.engine.connect() as conn:
+            raw = conn.execute(select(table.c.data).where(key_col == key)).scalar()
+        return json.loads(raw) if raw is not None else None
+
+    def allocate_id(self, kind: str) -> int:
+        self._ensure_counter(kind)
+        stmt = (
+            update(self.counters)
+            .where(self.counters.c.name == kind)
+            .values(value=self.counters.c.value + 1)
+            .returning(self.counters.c.value)
+        )
+        with self.engine.begin() as conn:
+            return int(conn.execute(stmt).scalar_one())
+
+    def ensure_id_floor(self, kind: str, value: int):
+        self._ensure_counter(kind)
+        stmt = (
+            update(self.counters)
+            .where(self.counters.c.name == kind, self.counters.c.value < value)
+            .values(value=value)
+        )
+        with self.engine.begin() as conn:
+            conn.execute(stmt)
+
+    def _ensure_counter(self, kind: str):
+        if kind in self._seeded:
+            return
+        with self._seed_lock:
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(self.counters.insert().values(name=kind, value=0))
+            except IntegrityError:
+                pass # Created by another worker
+            self._seeded.add(kind)
+
+    def get_company(self, company_id: int) -> Optional[dict]:
+        return self._get(self.companies, self.companies.c.company_id, company_id)
+
+    def put_company(self, company_id: int, company: dict):
+        self._upsert(self.companies, {"company_id": company_id}, company, updated_at=time.time())
+
+    def get_response(self, response_id: int) -> Optional[dict]:
+        response = self._get(self.responses, self.responses.c.response_id, response_id)
+        if response and isinstance(response.get("created_at"), str):
+            response["created_at"] = datetime.fromisoformat(response["created_at"])
+        return response
+
+    def put_response(self, response_id: int, response: dict):
+        self._upsert(self.responses, {"response_id": response_id}, response,
+                     company_id=response.get("company_id"), updated_at=time.time())
+
+    def put_item(self, response_id: int, item: dict):
+        self.put_items(response_id, [item])
+
+    def put_items(self, response_id: int, items: List[dict]):
+        if not items:
+            return
+        stmt = self._insert(self.items).values([
+            {"response_id": response_id, "question_id": item["question_id"], "data": self._dumps(item)} for item in items
+        ])
+        stmt = stmt.on_conflict_do_update(index_elements=["response_id", "question_id"], set_={"data": stmt.excluded.data})
+        with self.engine.begin() as conn:
+            conn.execute(stmt)
+            conn.execute(
+                update(self.responses).where(self.responses.c.response_id == response_id).values(updated_at=time.time())
+            )
+
+    def get_items(self, response_id: int) -> List[dict]:
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(self.items.c.data).where(self.items.c.response_id == response_id).order_by(self.items.c.question_id)
+            ).scalars().all()
+        return [json.loads(r) for r in rows]
+
+    def _delete_sessions(self, conn, rows):
+        response_ids = [r.response_id for r in rows]
+        company_ids = [r.company_id for r in rows if r.company_id is not None]
+        for i in range(0, len(response_ids), 500):
+            chunk = response_ids[i:i + 500]
+            conn.execute(delete(self.items).where(self.items.c.response_id.in_(chunk)))
+            conn.execute(delete(self.responses).where(self.responses.c.response_id.in_(chunk)))
+        # A company goes with its last response (another live response may still use it)
+        still_used = select(self.responses.c.company_id).where(self.responses.c.company_id.is_not(None))
+        for i in range(0, len(company_ids), 500):
+            conn.execute(delete(self.companies).where(
+                self.companies.c.company_id.in_(company_ids[i:i + 500]),
+                ~self.companies.c.company_id.in_(still_used)
+            ))
+
+    def delete_session(self, response_id: int):
+        with self.engine.begin() as conn:
+            rows = conn.execute(
+                select(self.responses.c.response_id, self.responses.c.company_id).where(self.responses.c.response_id == response_id)
+            ).all()
+            self._delete_sessions(conn, rows)
+
+    def evict(self, idle_before: float, max_sessions: int) -> Tuple[int, int]:
+        r = self.responses
+        with self.engine.begin() as conn:
+            expired = conn.execute(select(r.c.response_id, r.c.company_id).where(r.c.updated_at < idle_before)).all()
+            self._delete_sessions(conn, expired)
+
+            excess = conn.execute(select(func.count()).select_from(r)).scalar() - max_sessions
+            over_capacity = []
+            if excess > 0:
+                over_capacity = conn.execute(
+                    select(r.c.response_id, r.c.company_id).order_by(r.c.updated_at).limit(excess)
+                ).all()
+                self._delete_sessions(conn, over_capacity)
+
+            # Companies whose wizard never got to create a response
+            conn.execute(delete(self.companies).where(
+                self.companies.c.updated_at < idle_before,
+                ~self.companies.c.company_id.in_(select(r.c.company_id).where(r.c.company_id.is_not(None)))
+            ))
+            # Items saved for a response that does not exist (unknown or already released id)
+            conn.execute(delete(self.items).where(~self.items.c.response_id.in_(select(r.c.response_id))))
+        return len(expired), len(over_capacity)
+
+    def counts(self) -> Dict[str, int]:
+        with self.engine.connect() as conn:
+            row = conn.execute(select(
+                select(func.count()).select_from(self.companies).scalar_subquery(),
+                select(func.count()).select_from(self.responses).scalar_subquery(),
+                select(func.count()).select_from(self.items).scalar_subquery()
+            )).one()
+        return {"companies": row[0], "responses": row[1], "items": row[2]}
+
+
+def create_session_backend(settings) -> SessionBackend:
+    """Builds the backend selected by SESSION_STORE_BACKEND ("memory" or "sql")."""
+    kind = (settings.SESSION_STORE_BACKEND or "memory").lower()
+    if kind == "memory":
+        backend = InMemorySessionBackend()
+        if settings.SESSION_WAL_DIR:
+            from services.session_wal import SessionWAL
+            wal = SessionWAL(
+                settings.SESSION_WAL_DIR,
+                durability=settings.SESSION_WAL_DURABILITY,
+                fsync_interval_seconds=settings.SESSION_WAL_FSYNC_INTERVAL_MS / 1000,
+                snapshot_every=settings.SESSION_WAL_SNAPSHOT_EVERY
+            )
+            wal.recover(backend)
+            wal.start()
+        return backend
+    if kind == "sql":
+        url = settings.SESSION_STORE_URL or settings.DATABASE_URL
+        return SQLSessionBackend(url.replace("postgres://", "postgresql://"))
+    raise ValueError(f"Unknown SESSION_STORE_BACKEND '{settings.SESSION_STORE_BACKEND}'")
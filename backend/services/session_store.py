@@ -1,30 +1,46 @@
-from typing import Dict, List, Optional
+from typing import List, Optional, Tuple
 from schemas.company import CompanyCreate
 from schemas.response import ResponseCreate
 from database import SessionLocal
 from models.company import Company
 from models.response import Response
 from sqlalchemy import func
+from config import get_settings
+from services.session_backends import SessionBackend, create_session_backend, COMPANY, RESPONSE
 import logging
+import threading
+import time
 import uuid
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
 class SessionStore:
-    _instance = None
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(SessionStore, cls).__new__(cls)
-            cls._instance.companies: Dict[int, dict] = {}
-            cls._instance.responses: Dict[int, dict] = {}
-            cls._instance.response_values: Dict[int, List[dict]] = {} # response_id -> list of answers
-            
-            # Initialize counters from DB
-            cls._instance._init_counters()
-            
-        return cls._instance
+    """
+    In-progress assessment sessions until /complete persists them.
+    Storage is delegated to a SessionBackend (SESSION_STORE_BACKEND), so sessions
+    and ID allocation can be shared across uvicorn workers and nodes.
+    Safe to call from FastAPI's threadpool: backends allocate IDs atomically and
+    serialize writes per session.
+    """
+
+    def __init__(self, backend: Optional[SessionBackend] = None, ttl_seconds: Optional[int] = None,
+                 max_sessions: Optional[int] = None, sweep_interval_seconds: Optional[int] = None):
+        settings = get_settings()
+        self.backend = backend or create_session_backend(settings)
+        self.ttl_seconds = settings.SESSION_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_sessions = settings.SESSION_MAX_ACTIVE if max_sessions is None else max_sessions
+        self.sweep_interval_seconds = settings.SESSION_SWEEP_INTERVAL_SECONDS if sweep_interval_seconds is None else sweep_interval_seconds
+
+        self._last_sweep = time.monotonic()
+        self._sweep_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.evicted_expired = 0
+        self.evicted_capacity = 0
+        self.released = 0
+
+        # Initialize counters from DB
+        self._init_counters()
 
     def _init_counters(self):
         db = SessionLocal()
@@ -32,74 +48,126 @@ class SessionStore:
             # Get max IDs from DB to avoid collision
             max_c = db.query(func.max(Company.company_id)).scalar() or 0
             max_r = db.query(func.max(Response.response_id)).scalar() or 0
-            
-            self.company_counter = max_c
-            self.response_counter = max_r
             logger.info(f"Initialized SessionStore counters - Company: {max_c}, Response: {max_r}")
         except Exception as e:
             logger.error(f"Error initializing session counters, defaulting to 1000: {e}")
-            self.company_counter = 1000
-            self.response_counter = 1000
+            max_c = max_r = 1000
         finally:
             db.close()
 
+        self.backend.ensure_id_floor(COMPANY, max_c)
+        self.backend.ensure_id_floor(RESPONSE, max_r)
+
+    def sweep(self, force: bool = False):
+        """
+        Evicts abandoned sessions (TTL) and enforces the session cap.
+        Runs at most once per sweep interval unless forced; called on every new session.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_sweep < self.sweep_interval_seconds:
+            return
+        # Single flight: concurrent requests skip the sweep instead of queueing behind it
+        if not self._sweep_lock.acquire(blocking=force):
+            return
+        try:
+            self._last_sweep = now
+            expired, over_capacity = self.backend.evict(time.time() - self.ttl_seconds, self.max_sessions)
+        except Exception as e:
+            logger.error(f"Session sweep failed: {e}")
+            return
+        finally:
+            self._sweep_lock.release()
+        with self._stats_lock:
+            self.evicted_expired += expired
+            self.evicted_capacity += over_capacity
+        if expired or over_capacity:
+            logger.info(f"Evicted {expired} expired and {over_capacity} over-capacity sessions")
+
+    def release_session(self, response_id: int):
+        """Drops a session once /complete has persisted it."""
+        self.backend.delete_session(response_id)
+        with self._stats_lock:
+            self.released += 1
+
+    def close(self):
+        self.backend.close()
+
+    def stats(self) -> dict:
+        return {
+            "resident": self.backend.counts(),
+            "evicted_expired": self.evicted_expired,
+            "evicted_capacity": self.evicted_capacity,
+            "released": self.released,
+            "ttl_seconds": self.ttl_seconds,
+            "max_sessions": self.max_sessions
+        }
+
     def create_company(self, company: CompanyCreate) -> dict:
-        self.company_counter += 1
+        self.sweep()
+        company_id = self.backend.allocate_id(COMPANY)
         new_company = company.model_dump()
-        new_company["company_id"] = self.company_counter
-        self.companies[self.company_counter] = new_company
+        new_company["company_id"] = company_id
+        self.backend.put_company(company_id, new_company)
         return new_company
 
     def get_company(self, company_id: int) -> Optional[dict]:
-        return self.companies.get(company_id)
+        return self.backend.get_company(company_id)
 
     def update_company(self, company_id: int, company_data: CompanyCreate) -> Optional[dict]:
-        if company_id in self.companies:
+        if self.backend.get_company(company_id) is not None:
             updated_data = company_data.model_dump()
             updated_data["company_id"] = company_id
-            self.companies[company_id] = updated_data
-            return self.companies[company_id]
+            self.backend.put_company(company_id, updated_data)
+            return updated_data
         return None
 
     def create_response(self, response: ResponseCreate) -> dict:
-        self.response_counter += 1
+        self.sweep()
+        response_id = self.backend.allocate_id(RESPONSE)
         # Create a dict representation
         new_response = {
-            "response_id": self.response_counter,
+            "response_id": response_id,
             "company_id": response.company_id,
             "total_score": None,
             "created_at": datetime.utcnow(), 
             "cluster_id": None,
             "result_hash": str(uuid.uuid4())
         }
-        self.responses[self.response_counter] = new_response
+        self.backend.put_response(response_id, new_response)
         return new_response
 
     def get_response(self, response_id: int) -> Optional[dict]:
-        return self.responses.get(response_id)
+        return self.backend.get_response(response_id)
         
     def save_answer(self, response_id: int, question_id: int, answer_ids: List[int]):
-        if response_id not in self.response_values:
-            self.response_values[response_id] = []
-        
-        # Remove existing answer for this question
-        self.response_values[response_id] = [
-            x for x in self.response_values[response_id] 
-            if x["question_id"] != question_id
-        ]
-        
-        # Add new answer
         new_item = {
             "item_id": 0, # Dummy ID
             "response_id": response_id,
             "question_id": question_id,
             "answers": answer_ids
         }
-        self.response_values[response_id].append(new_item)
+        self.backend.put_item(response_id, new_item)
         return new_item
 
+    def save_answers(self, response_id: int, answers: List[Tuple[int, List[int]]]) -> List[dict]:
+        """
+        Saves several (question_id, answer_ids) pairs in one call.
+        Last write wins: a later entry for the same question replaces an earlier one.
+        """
+        latest = {}
+        for question_id, answer_ids in answers:
+            latest[question_id] = {
+                "item_id": 0, # Dummy ID
+                "response_id": response_id,
+                "question_id": question_id,
+                "answers": answer_ids
+            }
+        items = list(latest.values())
+        self.backend.put_items(response_id, items)
+        return items
+
     def get_response_items(self, response_id: int) -> List[dict]:
-        return self.response_values.get(response_id, [])
+        return self.backend.get_items(response_id)
 
     def get_full_session(self, response_id: int) -> Optional[dict]:
         response = self.get_response(response_id)
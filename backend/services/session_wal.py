@@ -0,0 +1,192 @@
+import glob
+import json
+import logging
+import os
+import threading
+from typing import Optional
+from services.session_backends import InMemorySessionBackend, dumps_session_json
+
+logger = logging.getLogger(__name__)
+
+ALWAYS = "always"
+BATCH = "batch"
+OFF = "off"
+
+SNAPSHOT_FILE = "snapshot.jsonl"
+
+
+class SessionWAL:
+    """
+    Append-only write-ahead log + compacted snapshots for InMemorySessionBackend.
+
+    Layout of the directory:
+      wal-00000042.log   JSON-lines journal segments (one record per mutation)
+      snapshot.jsonl     full state as records; the first line names the first segment to replay
+
+    Every record is written (and flushed to the OS) before the mutation is applied, so a
+    process crash or deploy loses nothing. Machine crashes are covered according to durability:
+      always  fsync per record
+      batch   fsync by a background thread every fsync_interval_seconds (group commit)
+      off     never fsync
+    After snapshot_every records the background thread rotates to a new segment, writes a snapshot
+    and deletes the segments it covers. Replay = snapshot + remaining segments; all records are
+    idempotent upserts/deletes, so records captured by both are harmless.
+    """
+
+    def __init__(self, directory: str, durability: str = BATCH, fsync_interval_seconds: float = 0.1,
+                 snapshot_every: int = 50000):
+        if durability not in (ALWAYS, BATCH, OFF):
+            raise ValueError(f"Unknown session WAL durability '{durability}'")
+        self.directory = directory
+        self.durability = durability
+        self.fsync_interval_seconds = fsync_interval_seconds
+        self.snapshot_every = snapshot_every
+
+        self.backend: Optional[InMemorySessionBackend] = None
+        self._file = None
+        self._segment = 0
+        self._dirty = False
+        self._since_snapshot = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        os.makedirs(directory, exist_ok=True)
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"wal-{segment:08d}.log")
+
+    def _segments(self):
+        paths = glob.glob(os.path.join(self.directory, "wal-*.log"))
+        return sorted(int(os.path.basename(p)[4:12]) for p in paths)
+
+    @staticmethod
+    def _read_records(path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn write at the tail of the log (crash mid-append)
+                    logger.warning(f"Skipping truncated session WAL record in {path}")
+                    return
+
+    def recover(self, backend: InMemorySessionBackend) -> int:
+        """Rebuilds backend from snapshot + log, then compacts and starts journaling it."""
+        self.backend = backend
+        replayed = 0
+        first_segment = 0
+
+        snapshot_path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            records = self._read_records(snapshot_path)
+            header = next(records, None)
+            if header is not None:
+                first_segment = header["segment"]
+                for record in records:
+                    backend.apply(record)
+                    replayed += 1
+
+        segments = [s for s in self._segments() if s >= first_segment]
+        for segment in segments:
+            for record in self._read_records(self._segment_path(segment)):
+                backend.apply(record)
+                replayed += 1
+
+        self._segment = max(segments + [first_segment - 1, 0])
+        self._file = open(self._segment_path(self._segment), "a", encoding="utf-8")
+        if replayed:
+            logger.info(f"Recovered sessions from WAL: {replayed} records, {backend.counts()}")
+
+        self.compact()
+        backend.journal = self
+        return replayed
+
+    def append(self, record: dict):
+        line = dumps_session_json(record) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if self.durability == ALWAYS:
+                os.fsync(self._file.fileno())
+            else:
+                self._dirty = True
+            self._since_snapshot += 1
+            compact_due = self._since_snapshot >= self.snapshot_every
+        if compact_due:
+            self._wake.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="session-wal", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.fsync_interval_seconds)
+            self._wake.clear()
+            self._sync()
+            if self._since_snapshot >= self.snapshot_every:
+                try:
+                    self.compact()
+                except Exception as e:
+                    logger.error(f"Session snapshot failed: {e}")
+
+    def _sync(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            if self._dirty and self.durability == BATCH:
+                os.fsync(self._file.fileno())
+            self._dirty = False
+
+    def compact(self):
+        """Rotates the log, writes a snapshot of the backend and drops the covered segments."""
+        with self._lock:
+            self._file.flush()
+            if self.durability != OFF:
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._segment += 1
+            self._file = open(self._segment_path(self._segment), "a", encoding="utf-8")
+            self._dirty = False
+            self._since_snapshot = 0
+            first_segment = self._segment
+
+        # Everything logged to older segments has been applied by now (records are appended
+        # under the session's stripe lock, which dump() takes as well)
+        snapshot_path = os.path.join(self.directory, SNAPSHOT_FILE)
+        tmp_path = snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"segment": first_segment}) + "\n")
+            for record in self.backend.dump():
+                f.write(dumps_session_json(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, snapshot_path)
+        self._fsync_directory()
+
+        for segment in self._segments():
+            if segment < first_segment:
+                os.remove(self._segment_path(segment))
+
+    def _fsync_directory(self):
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return # Not supported on this platform
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def close(self):
+        self._stopped.set()
+        self._wake.set()
+        with self._lock:
+            if self._file is not None and not self._file.closed:
+                self._file.flush()
+                if self.durability != OFF:
+                    os.fsync(self._file.fileno())
+                self._file.close()
@@ -0,0 +1,92 @@
+"""
+Unit tests for the DATABASE_URL -> asyncpg conversion of the async engine (database._async_engine_args)
+and the split of the connection budget between the sync and the async engine.
+libpq query parameters (sslmode, options, ...) must never reach asyncpg.connect().
+
+Run from backend/:  python test_async_database_url.py   (or: python -m pytest test_async_database_url.py)
+"""
+
+import os
+import ssl
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'app.db')}")
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import database
+from database import _async_engine_args, _pool_split
+
+
+def _connect_kwargs(url, connect_args):
+    """What the asyncpg dialect would pass to asyncpg.connect()."""
+    engine = create_async_engine(url, connect_args=connect_args)
+    try:
+        _, kwargs = engine.sync_engine.dialect.create_connect_args(engine.sync_engine.url)
+    finally:
+        engine.sync_engine.dispose()
+    return {**kwargs, **connect_args}
+
+
+def test_plain_url():
+    url, connect_args = _async_engine_args("postgresql://u:p@db.example.com:5432/app")
+    assert url == "postgresql+asyncpg://u:p@db.example.com:5432/app"
+    assert connect_args == {}
+
+    url, _ = _async_engine_args("postgresql+psycopg2://u:p@db.example.com/app")
+    assert make_url(url).drivername == "postgresql+asyncpg"
+
+
+def test_sslmode():
+    url, connect_args = _async_engine_args("postgresql://u:p@db.example.com/app?sslmode=require")
+    assert url == "postgresql+asyncpg://u:p@db.example.com/app"
+    assert connect_args == {"ssl": "require"}
+    kwargs = _connect_kwargs(url, connect_args)
+    assert "sslmode" not in kwargs and kwargs["ssl"] == "require"
+
+
+def test_ssl_root_certificate():
+    _, connect_args = _async_engine_args("postgresql://u:p@db.example.com/app?sslmode=verify-full&sslrootcert=system")
+    context = connect_args["ssl"]
+    assert isinstance(context, ssl.SSLContext)
+    assert context.check_hostname and context.verify_mode == ssl.CERT_REQUIRED
+
+    _, connect_args = _async_engine_args("postgresql://u:p@db.example.com/app?sslmode=require&sslrootcert=system")
+    context = connect_args["ssl"]
+    assert not context.check_hostname and context.verify_mode == ssl.CERT_REQUIRED # verify-ca, as libpq
+
+
+def test_libpq_parameters():
+    url, connect_args = _async_engine_args(
+        "postgresql://u:p@/app?host=/var/run/postgresql&application_name=api&connect_timeout=10"
+        "&options=-c%20statement_timeout%3D5000%20-c%20search_path%3Dapp&channel_binding=require&gssencmode=disable"
+    )
+    assert make_url(url).query == {"host": "/var/run/postgresql"}
+    assert connect_args == {
+        "server_settings": {"statement_timeout": "5000", "search_path": "app", "application_name": "api"},
+        "timeout": 10.0
+    }
+    kwargs = _connect_kwargs(url, connect_args)
+    assert not {"options", "channel_binding", "gssencmode", "connect_timeout", "application_name"} & set(kwargs)
+
+
+def test_pool_split():
+    settings = database.settings
+    enabled, share = settings.DB_ASYNC_ENDPOINTS, settings.DB_ASYNC_POOL_SHARE
+    try:
+        settings.DB_ASYNC_ENDPOINTS, settings.DB_ASYNC_POOL_SHARE = True, 0.5
+        assert _pool_split(10, 1) == (5, 5)
+        assert _pool_split(5, 1) in ((3, 2), (2, 3))
+        assert _pool_split(1, 1) == (1, 1)
+        assert _pool_split(0, 0) == (0, 0)
+        settings.DB_ASYNC_ENDPOINTS = False
+        assert _pool_split(10, 1)[0] == 10
+    finally:
+        settings.DB_ASYNC_ENDPOINTS, settings.DB_ASYNC_POOL_SHARE = enabled, share
+
+
+if __name__ == "__main__":
+    for test in (test_plain_url, test_sslmode, test_ssl_root_certificate, test_libpq_parameters, test_pool_split):
+        test()
+        print(f"{test.__name__}: OK")
@@ -0,0 +1,69 @@
+"""
+Import-time regression test for the API startup path.
+Imports main in a fresh interpreter under `python -X importtime` and fails if
+- a heavy library (pandas, sklearn, ReportLab, ...) is imported at startup, or
+- the cumulative import time of main exceeds the budget.
+
+Heavy libraries belong on the results/PDF paths, imported on first use.
+
+Run from backend/:  python test_import_time.py   (or: python -m pytest test_import_time.py)
+Budget: IMPORT_TIME_BUDGET_MS (default 2000 ms; measured ~1.1 s on a dev laptop).
+"""
+
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", 2000))
+RUNS = 3 # Best of, to ride out a cold disk cache / noisy CI neighbours
+
+# Must not be imported before the first results / PDF request
+DEFERRED_MODULES = ("pandas", "numpy", "sklearn", "scipy", "reportlab", "joblib", "benchmarking_ai")
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def _import_main():
+    """Returns ({top-level package: first seen}, cumulative microseconds of main)."""
+    env = dict(os.environ)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Importing main must not need a reachable database
+        env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'import_time.db')}")
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import main"],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120
+        )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+    modules = set()
+    main_us = None
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        modules.add(name.split(".")[0])
+        if name == "main":
+            main_us = int(match.group(2))
+    assert main_us is not None, "main not found in -X importtime output"
+    return modules, main_us
+
+
+def test_heavy_modules_deferred():
+    modules, _ = _import_main()
+    loaded = [m for m in DEFERRED_MODULES if m in modules]
+    assert not loaded, f"Imported at startup (move the import to first use): {loaded}"
+
+
+def test_import_time_budget():
+    best_ms = min(_import_main()[1] for _ in range(RUNS)) / 1000
+    assert best_ms <= BUDGET_MS, f"Importing main took {best_ms:.0f} ms (budget {BUDGET_MS:.0f} ms)"
+
+
+if __name__ == "__main__":
+    for test in (test_heavy_modules_deferred, test_import_time_budget):
+        test()
+        print(f"{test.__name__}: OK")
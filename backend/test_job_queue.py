@@ -0,0 +1,154 @@
+"""
+Concurrency test for the background job queue (services/job_queue.py).
+Two JobQueue instances on one database stand in for two workers / app instances:
+a job handed to both must run exactly once, and resume_pending() must leave
+jobs under another process' unexpired lease alone. A committed job that was never
+submitted (crash between commit and submit, full queue) is delivered by the outbox drainer.
+
+Run from backend/:  python test_job_queue.py   (or: python -m pytest test_job_queue.py)
+Database: TEST_DATABASE_URL (default: a temporary SQLite file)
+"""
+
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'app.db')}")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import Job
+from services.job_queue import JobQueue, QUEUED, RUNNING, SUCCEEDED, _now
+
+RACES = 30
+
+_engine = create_engine(os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{os.path.join(_tmp, 'jobs.db')}")
+Base.metadata.create_all(bind=_engine, tables=[Job.__table__])
+Session = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
+
+
+def _queue(handler):
+    q = JobQueue(workers=0, max_queue_size=100, max_attempts=3, retry_backoff_seconds=0.05,
+                 lease_seconds=60, poll_interval_seconds=0, session_factory=Session)
+    q.register("test", handler)
+    return q
+
+
+def _add_job(q, **values):
+    db = Session()
+    try:
+        job = q.stage("test", ref="ref", payload={}, db=db)
+        for name, value in values.items():
+            setattr(job, name, value)
+        db.commit()
+        return job.job_id
+    finally:
+        db.close()
+
+
+def _job(job_id):
+    db = Session()
+    try:
+        return db.query(Job).filter(Job.job_id == job_id).first()
+    finally:
+        db.close()
+
+
+def test_one_worker_wins_the_race():
+    runs = {}
+    lock = threading.Lock()
+
+    def handler(payload, db):
+        with lock:
+            runs[current] = runs.get(current, 0) + 1
+        time.sleep(0.01) # Keep the winner busy while the loser tries to claim
+
+    workers = [_queue(handler), _queue(handler)]
+    for _ in range(RACES):
+        current = _add_job(workers[0])
+        barrier = threading.Barrier(len(workers))
+
+        def run(q):
+            barrier.wait()
+            q._run(current)
+
+        threads = [threading.Thread(target=run, args=(q,)) for q in workers]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        job = _job(current)
+        assert runs[current] == 1, runs[current]
+        assert job.status == SUCCEEDED and job.attempts == 1
+
+
+def test_resume_respects_leases():
+    ran = []
+    q = _queue(lambda payload, db: ran.append(payload))
+    now = _now()
+    queued = _add_job(q)
+    leased = _add_job(q, status=RUNNING, attempts=1, claimed_at=now, lease_expires_at=now + timedelta(minutes=5))
+    expired = _add_job(q, status=RUNNING, attempts=1, claimed_at=now - timedelta(hours=1),
+                       lease_expires_at=now - timedelta(minutes=5))
+
+    resumed = []
+    q._submit = resumed.append
+    q.resume_pending()
+    assert queued in resumed and expired in resumed
+    assert leased not in resumed
+
+    # Handing the leased job to a worker anyway does not run it a second time
+    q._run(leased)
+    assert _job(leased).status == RUNNING and not ran
+    q._run(expired)
+    assert _job(expired).status == SUCCEEDED and _job(expired).attempts == 2
+
+
+def test_lost_lease_keeps_new_owner():
+    q = _queue(lambda payload, db: None)
+    job_id = _add_job(q, status=QUEUED)
+    db = Session()
+    try:
+        job = q._claim(job_id, db)
+        # Another worker reclaims the job (e.g. after this one stalled past its lease)
+        other = Session()
+        other.query(Job).filter(Job.job_id == job_id).update({"attempts": job.attempts + 1})
+        other.commit()
+        other.close()
+        assert not q._finish(job, db, status=SUCCEEDED)
+    finally:
+        db.close()
+    assert _job(job_id).status == RUNNING
+
+
+def test_drainer_delivers_unsubmitted_jobs():
+    ran = []
+    q = JobQueue(workers=1, max_queue_size=1, max_attempts=3, retry_backoff_seconds=0.05,
+                 lease_seconds=60, poll_interval_seconds=0.05, session_factory=Session)
+    q.register("test", lambda payload, db: ran.append(payload["n"]) or time.sleep(0.02))
+    db = Session()
+    db.query(Job).delete() # Leftovers of the other tests would be drained too
+    db.commit()
+    db.close()
+    # Committed but never submitted, more than the queue has room for
+    job_ids = [_add_job(q, payload={"n": n}) for n in range(5)]
+    q.start()
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline and any(_job(j).status != SUCCEEDED for j in job_ids):
+        time.sleep(0.05)
+    assert [_job(j).status for j in job_ids] == [SUCCEEDED] * len(job_ids)
+    assert sorted(ran) == list(range(5))
+
+
+if __name__ == "__main__":
+    for test in (test_one_worker_wins_the_race, test_resume_respects_leases, test_lost_lease_keeps_new_owner,
+                 test_drainer_delivers_unsubmitted_jobs):
+        test()
+        print(f"{test.__name__}: OK")
@@ -0,0 +1,147 @@
+"""
+Stress test for the thread-safe SessionStore (in-memory backend).
+Hammers ID allocation, autosaves and sweeps from many threads and checks
+that no ID is handed out twice and no autosave is lost.
+
+Run from backend/:  python test_session_store.py   (or: python -m pytest test_session_store.py)
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from schemas.company import CompanyCreate
+from schemas.response import ResponseCreate
+from services.session_backends import InMemorySessionBackend, SQLSessionBackend
+from services.session_store import SessionStore
+
+THREADS = 32
+ROUNDS = 200
+
+COMPANY = CompanyCreate(
+    company_name="Stress GmbH", industry="Manufacturing", number_of_employees="10-49",
+    email="stress@example.com", city="Berlin", website="example.com"
+)
+
+
+def _store():
+    return SessionStore(backend=InMemorySessionBackend(stripes=8), ttl_seconds=3600, max_sessions=10**6, sweep_interval_seconds=0)
+
+
+def _hammer(fn, n_threads=THREADS):
+    # Small switch interval = many more thread interleavings per operation
+    old_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    barrier = threading.Barrier(n_threads)
+
+    def run(t):
+        barrier.wait()
+        return fn(t)
+
+    try:
+        with ThreadPoolExecutor(n_threads) as pool:
+            return list(pool.map(run, range(n_threads)))
+    finally:
+        sys.setswitchinterval(old_interval)
+
+
+def test_unique_ids():
+    store = _store()
+
+    def work(_):
+        ids = []
+        for _ in range(ROUNDS):
+            company = store.create_company(COMPANY)
+            response = store.create_response(ResponseCreate(company_id=company["company_id"]))
+            ids.append((company["company_id"], response["response_id"]))
+        return ids
+
+    ids = [i for chunk in _hammer(work) for i in chunk]
+    company_ids = [c for c, _ in ids]
+    response_ids = [r for _, r in ids]
+    assert len(set(company_ids)) == len(company_ids) == THREADS * ROUNDS
+    assert len(set(response_ids)) == len(response_ids) == THREADS * ROUNDS
+    assert store.stats()["resident"]["responses"] == THREADS * ROUNDS
+
+
+def test_no_lost_autosaves():
+    store = _store()
+    company = store.create_company(COMPANY)
+    shared = store.create_response(ResponseCreate(company_id=company["company_id"]))["response_id"]
+    own = [store.create_response(ResponseCreate(company_id=company["company_id"]))["response_id"] for _ in range(THREADS)]
+
+    def work(t):
+        for i in range(ROUNDS):
+            # Every thread owns a disjoint question range of the shared session ...
+            store.save_answer(shared, t * ROUNDS + i, [i])
+            # ... and rewrites a handful of questions in its own session
+            store.save_answer(own[t], i % 10, [t, i])
+            if i % 50 == 0:
+                store.sweep(force=True)
+
+    _hammer(work)
+
+    shared_items = store.get_response_items(shared)
+    assert len(shared_items) == THREADS * ROUNDS
+    assert {it["question_id"] for it in shared_items} == set(range(THREADS * ROUNDS))
+    for t, response_id in enumerate(own):
+        items = {it["question_id"]: it["answers"] for it in store.get_response_items(response_id)}
+        assert len(items) == 10
+        # Last write wins per question
+        assert all(items[q] == [t, ROUNDS - 10 + q] for q in range(10))
+
+
+def test_release_while_saving():
+    store = _store()
+    company = store.create_company(COMPANY)
+    response_ids = [store.create_response(ResponseCreate(company_id=company["company_id"]))["response_id"] for _ in range(THREADS)]
+
+    def work(t):
+        for i in range(ROUNDS):
+            store.save_answer(response_ids[t], i, [i])
+        store.release_session(response_ids[t])
+
+    _hammer(work)
+    assert store.stats()["released"] == THREADS
+    assert store.stats()["resident"]["responses"] == 0
+
+
+def test_shared_company_survives_delete():
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = [InMemorySessionBackend(stripes=8), SQLSessionBackend(f"sqlite:///{os.path.join(tmp, 'sessions.db')}")]
+        for backend in backends:
+            store = SessionStore(backend=backend, ttl_seconds=3600, max_sessions=10**6, sweep_interval_seconds=0)
+            company_id = store.create_company(COMPANY)["company_id"]
+            first = store.create_response(ResponseCreate(company_id=company_id))["response_id"]
+            second = store.create_response(ResponseCreate(company_id=company_id))["response_id"]
+
+            store.release_session(first)
+            assert store.get_full_session(second)["company"] is not None, type(backend).__name__
+            store.release_session(second)
+            assert store.get_company(company_id) is None, type(backend).__name__
+            backend.close()
+
+
+def test_orphan_items_evicted():
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = [InMemorySessionBackend(stripes=8), SQLSessionBackend(f"sqlite:///{os.path.join(tmp, 'sessions.db')}")]
+        for backend in backends:
+            store = SessionStore(backend=backend, ttl_seconds=3600, max_sessions=10**6, sweep_interval_seconds=0)
+            company_id = store.create_company(COMPANY)["company_id"]
+            live = store.create_response(ResponseCreate(company_id=company_id))["response_id"]
+            store.save_answer(live, 1, [1])
+            store.save_answer(live + 1000, 1, [1]) # No such response
+
+            backend.evict(idle_before=0, max_sessions=10**6)
+            assert backend.counts()["items"] == 1, type(backend).__name__
+            assert len(store.get_response_items(live)) == 1, type(backend).__name__
+            backend.close()
+
+
+if __name__ == "__main__":
+    for test in (test_unique_ids, test_no_lost_autosaves, test_release_while_saving, test_shared_company_survives_delete,
+                 test_orphan_items_evicted):
+        test()
+        print(f"{test.__name__}: OK")
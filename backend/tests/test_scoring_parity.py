@@ -0,0 +1,140 @@
+"""
+Parity test: the vectorized ScoringEngine (benchmarking_ai.ml_v5.scoring) used by the results
+endpoint must produce the same dimension scores (dim_results) and per-question score_1to5
+as the pandas merge/groupby path it replaced, which is kept below as the reference.
+Reference data: db_backups/*.json. Random answer sets include skipped questions, empty and
+missing answer lists, unknown answer ids and answers that belong to another question.
+
+Run from backend/:  python tests/test_scoring_parity.py   (or: python -m pytest tests/test_scoring_parity.py)
+"""
+
+import json
+import os
+import random
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+import pandas as pd
+
+import ml_path  # noqa: F401 - makes benchmarking_ai importable
+from benchmarking_ai.ml_v5.scoring import ScoringEngine
+
+CASES = 400
+
+
+def _reference_data():
+    def load(name):
+        with open(os.path.join(BACKEND_DIR, "db_backups", f"{name}_backup.json"), encoding="utf-8") as f:
+            return json.load(f)
+    return load("questions"), load("dimensions"), load("answers")
+
+
+def _pandas_score(items, questions_all, dims_all, answers_all):
+    """The former routers/results.py scoring (pandas), returns (dim_results, grouped_q)."""
+    df_items = pd.DataFrame(items)
+    df_questions = pd.DataFrame([{
+        "question_id": q["question_id"], "dimension_id": q["dimension_id"], "question_weight": q["weight"],
+        "question_type": q["type"], "question_text": q["question_text"], "question_text_de": q.get("question_text_de"),
+        "tactical_theme": q["header"], "tactical_theme_de": q.get("header_de")
+    } for q in questions_all])
+    df_dims = pd.DataFrame([{
+        "dimension_id": d["dimension_id"], "dimension_name": d["dimension_name"], "dimension_name_de": d.get("dimension_name_de")
+    } for d in dims_all])
+    df_answers_ref = pd.DataFrame([{
+        "answer_id": a["answer_id"], "question_id": a["question_id"], "answer_weight": a["answer_weight"]
+    } for a in answers_all])
+
+    df_items["answers"] = df_items["answers"].apply(lambda x: x if isinstance(x, list) and len(x) > 0 else [0])
+    df_items_exploded = df_items.explode("answers").rename(columns={"answers": "answer_id"})
+    df_items_exploded["answer_id"] = df_items_exploded["answer_id"].astype(float).fillna(0).astype(int)
+
+    full_df = df_items_exploded.merge(df_answers_ref, on=["answer_id", "question_id"], how="left")
+    full_df = full_df.merge(df_questions, on="question_id", how="left")
+    full_df = full_df.merge(df_dims, on="dimension_id", how="left")
+    ans_stats = df_answers_ref.groupby("question_id").agg(
+        total_possible_weight=("answer_weight", "sum"), max_possible_weight=("answer_weight", "max")
+    ).reset_index()
+    full_df = full_df.merge(ans_stats, on="question_id", how="left")
+    full_df.fillna({
+        "dimension_name": "Unknown Dimension", "dimension_name_de": "Unbekannte Dimension",
+        "question_text": "Unknown Question", "question_text_de": "Unbekannte Frage",
+        "tactical_theme": "General", "tactical_theme_de": "Allgemein",
+        "question_type": "Slider", "question_weight": 1.0
+    }, inplace=True)
+
+    grouped_q = full_df.groupby([
+        "question_id", "dimension_name", "dimension_name_de", "question_weight", "question_type",
+        "total_possible_weight", "max_possible_weight", "question_text", "question_text_de",
+        "tactical_theme", "tactical_theme_de"
+    ])["answer_weight"].sum().reset_index().rename(columns={"answer_weight": "sum_selected_weight"})
+
+    def question_score(row):
+        if row["question_type"] == "Checklist":
+            total_w = row["total_possible_weight"]
+            ratio = row["sum_selected_weight"] / total_w if total_w > 0 else 0
+        else:
+            max_w = row["max_possible_weight"]
+            ratio = row["sum_selected_weight"] / max_w if max_w > 0 else 0
+        return (min(1.0, ratio) * row["question_weight"]) / 100
+
+    grouped_q["question_score_contrib"] = grouped_q.apply(question_score, axis=1)
+    dim_results = grouped_q.groupby("dimension_name").apply(
+        lambda x: (x["question_score_contrib"].sum() / (x["question_weight"].sum() / 100)) * 4 + 1
+        if x["question_weight"].sum() > 0 else 1.0
+    )
+    expected_dims = sorted(d for d in df_dims["dimension_name"].unique().tolist() if d != "General Psychology")
+    dim_results = dim_results.reindex(expected_dims, fill_value=1.0)
+
+    grouped_q["score_1to5"] = ((grouped_q["question_score_contrib"] / (grouped_q["question_weight"] / 100)) * 4 + 1).fillna(1.0)
+    grouped_q = grouped_q[grouped_q["dimension_name"] != "General Psychology"]
+    return dim_results, grouped_q
+
+
+def _random_items(rng, questions, answers_by_question):
+    items = []
+    for q in questions:
+        if rng.random() < 0.2:
+            continue # Skipped question
+        own = [a["answer_id"] for a in answers_by_question.get(q["question_id"], [])]
+        selected = rng.sample(own, rng.randint(0, min(3, len(own))))
+        if rng.random() < 0.05:
+            selected.append(999999) # Unknown answer id
+        if rng.random() < 0.05:
+            selected.append(1) # Possibly an answer of another question
+        items.append({"question_id": q["question_id"], "answers": selected if selected or rng.random() < 0.5 else None})
+    return items
+
+
+def test_scoring_matches_pandas():
+    questions, dimensions, answers = _reference_data()
+    answers_by_question = {}
+    for a in answers:
+        answers_by_question.setdefault(a["question_id"], []).append(a)
+    engine = ScoringEngine(questions, answers, dimensions)
+
+    rng = random.Random(2)
+    for case in range(CASES):
+        items = _random_items(rng, questions, answers_by_question)
+        if not items:
+            continue
+        dim_results, grouped_q = _pandas_score([dict(i) for i in items], questions, dimensions, answers)
+        scores = engine.score(items)
+
+        assert list(dim_results.index) == engine.feature_dimensions, case
+        np.testing.assert_allclose(scores["feature_scores"], dim_results.values, rtol=0, atol=1e-12, err_msg=str(case))
+        # What the API returns (dimension_scores, overall_score) must not differ even after rounding
+        assert np.array_equal(np.round(scores["feature_scores"], 2), dim_results.round(2).values), case
+
+        question_dims = [engine.dimension_names[d] for d in engine.question_dims[scores["question_index"]]]
+        keep = np.array([name != "General Psychology" for name in question_dims], dtype=bool)
+        assert scores["question_ids"][keep].tolist() == grouped_q["question_id"].tolist(), case
+        np.testing.assert_allclose(scores["score_1to5"][keep], grouped_q["score_1to5"].values, rtol=0, atol=1e-12, err_msg=str(case))
+
+
+if __name__ == "__main__":
+    for test in (test_scoring_matches_pandas,):
+        test()
+        print(f"{test.__name__}: OK")
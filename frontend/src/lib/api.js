@@ -69,16 +69,38 @@ export const api = {
         return handleResponse(response);
     },
 
+    /**
+     * Autosave several answers in one request (last entry per question wins)
+     * @param {number} responseId
+     * @param {Array<{questionId: number, answerIds: Array<number>}>} answers
+     */
+    saveAnswers: async (responseId, answers) => {
+        const response = await fetch(`${API_BASE_URL}/responses/${responseId}/items/batch`, {
+            method: 'PATCH',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                items: answers.map(a => ({
+                    question_id: a.questionId,
+                    answer_ids: a.answerIds
+                }))
+            }),
+        });
+        return handleResponse(response);
+    },
+
     /**
      * Complete the assessment
      * @param {number} responseId 
      * @param {Object} companyDetails 
      * @param {string} lang
+     * @param {string} [idempotencyKey] Same key for retries of the same submission
      */
-    completeAssessment: async (responseId, companyDetails, lang = 'en') => {
+    completeAssessment: async (responseId, companyDetails, lang = 'en', idempotencyKey = undefined) => {
+        const headers = { 'Content-Type': 'application/json' };
+        if (idempotencyKey) headers['Idempotency-Key'] = idempotencyKey;
         const response = await fetch(`${API_BASE_URL}/responses/${responseId}/complete`, {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers,
             body: JSON.stringify({ company_details: companyDetails, lang: lang }),
         });
         return handleResponse(response);
@@ -102,6 +124,16 @@ export const api = {
         return handleResponse(response);
     },
 
+    /**
+     * Poll the delivery status of the PDF report email queued at verification
+     * @param {string} token
+     * @returns {Promise<{job_id: string, status: 'queued'|'running'|'retrying'|'succeeded'|'failed', attempts: number}>}
+     */
+    getReportStatus: async (token) => {
+        const response = await fetch(`${API_BASE_URL}/responses/${token}/report-status`);
+        return handleResponse(response);
+    },
+
     /**
      * Download PDF Report
      * @param {number} responseId
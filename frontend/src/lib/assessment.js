@@ -50,6 +50,22 @@ export async function initializeVisitorSession() {
     }
 }
 
+/**
+ * Idempotency key for completing the current response.
+ * Stable across retries in this browser session, so a retried submit never completes twice.
+ * @param {number|string} responseId
+ * @returns {string}
+ */
+export function getCompletionKey(responseId) {
+    const storageKey = `ai_compass_completion_key_${responseId}`;
+    let key = sessionStorage.getItem(storageKey);
+    if (!key) {
+        key = crypto.randomUUID();
+        sessionStorage.setItem(storageKey, key);
+    }
+    return key;
+}
+
 /**
  * Retrieves current session data.
  */
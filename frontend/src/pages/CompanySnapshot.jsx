@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { PageBackground } from '@/components/ui/PageBackground';
 import { useNavigate } from 'react-router-dom';
 import { api } from '../lib/api';
-import { getSession } from '../lib/assessment';
+import { getSession, getCompletionKey } from '../lib/assessment';
 import { Card, CardHeader, CardTitle, CardContent, CardDescription, CardFooter } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
@@ -72,7 +72,7 @@ export default function CompanySnapshot() {
 
         try {
             // 1. Trigger Backend Completion
-            const { result_hash } = await api.completeAssessment(parseInt(session.responseId), formData, i18n.language);
+            const { result_hash } = await api.completeAssessment(parseInt(session.responseId), formData, i18n.language, getCompletionKey(session.responseId));
 
             // 2. Ensure Minimum Loading Time
             const elapsed = Date.now() - startTime;
@@ -245,9 +245,10 @@ export default function QuestionnaireWizard() {
             const remaining = questions.slice(currentIndex);
             const d8Questions = remaining.filter(q => q.dimension_id === 8);
 
-            await Promise.all(d8Questions.map(q =>
-                api.saveAnswer(parseInt(responseId), q.question_id, [])
-            ));
+            await api.saveAnswers(parseInt(responseId), d8Questions.map(q => ({
+                questionId: q.question_id,
+                answerIds: []
+            })));
 
             // Mark skipped as answered (or handled)
             const newAnswered = { ...answeredMap };